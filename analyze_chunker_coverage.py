@@ -6,6 +6,7 @@ from nltk_trainer import load_corpus_reader, load_model, simplify_wsj_tag
 from nltk_trainer.chunking import chunkers
 from nltk_trainer.chunking.transforms import node_label
 from nltk_trainer.tagging import taggers
+from nltk_trainer.tagging.batch import batch_tag_sents
 
 ########################################
 ## command options & argument parsing ##
@@ -28,6 +29,9 @@ parser.add_argument('--trace', default=1, type=int,
 	help='How much trace output you want, defaults to 1. 0 is no trace output.')
 parser.add_argument('--score', action='store_true', default=False,
 	help='Evaluate chunk score of chunker using corpus.chunked_sents()')
+parser.add_argument('--jobs', default=1, type=int,
+	help='''Number of worker processes to tag sentences with, defaults to %(default)d.
+Batches of sentences are tagged in parallel, and results are kept in corpus order.''')
 
 corpus_group = parser.add_argument_group('Corpus Reader Options')
 corpus_group.add_argument('--reader', default=None,
@@ -102,8 +106,8 @@ if args.fraction != 1.0:
 	cutoff = int(math.ceil(len(sents) * args.fraction))
 	sents = sents[:cutoff]
 
-for sent in sents:
-	tree = chunker.parse(tagger.tag(sent))
+for tagged_sent in batch_tag_sents(tagger, sents, jobs=args.jobs):
+	tree = chunker.parse(tagged_sent)
 	
 	for child in tree.subtrees(lambda t: node_label(t) != 'S'):
 		iobs_found[node_label(child)] += 1
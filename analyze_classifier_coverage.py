@@ -1,13 +1,11 @@
 #!/usr/bin/env python
-import argparse, collections, functools, itertools, operator, re, string, time
+import argparse, collections, itertools, re, string, time
 import nltk.data
-from nltk.classify.util import accuracy
 from nltk.corpus import stopwords
-from nltk.metrics import f_measure, precision, recall
-from nltk.util import ngrams
 from nltk_trainer import load_corpus_reader, pickle, simplify_wsj_tag
 from nltk_trainer.classification import corpus, scoring
-from nltk_trainer.classification.featx import bag_of_words
+from nltk_trainer.classification.featx import bag_of_words, hashed_bag_of_words, load_hash_config
+from nltk_trainer.normalize import WordNormalizer
 
 ########################################
 ## command options & argument parsing ##
@@ -56,6 +54,9 @@ feat_group.add_argument('--filter-stopwords', default='no',
 	help='language stopwords to filter, defaults to "no" to keep stopwords')
 feat_group.add_argument('--punctuation', action='store_true', default=False,
 	help="don't strip punctuation")
+feat_group.add_argument('--hash-features', default=0, type=int, metavar='BITS',
+	help='''Hash words and ngrams into 2**BITS integer features. Only needed if
+	the classifier has no hashing config stored next to it.''')
 
 args = parser.parse_args()
 
@@ -92,28 +93,9 @@ if args.filter_stopwords == 'no':
 else:
 	stopset = set(stopwords.words(args.filter_stopwords))
 
-if not args.punctuation:
-	stopset |= set(string.punctuation)
-
-def norm_words(words):
-	if not args.no_lowercase:
-		words = [w.lower() for w in words]
-	
-	if not args.punctuation:
-		words = [w.strip(string.punctuation) for w in words]
-		words = [w for w in words if w]
-	
-	if stopset:
-		words = [w for w in words if w.lower() not in stopset]
-
-	# in case we modified words in a generator, ensure it's a list so we can add together
-	if not isinstance(words, list):
-		words = list(words)
-
-	if args.ngrams:
-		return functools.reduce(operator.add, [words if n == 1 else list(ngrams(words, n)) for n in args.ngrams])
-	else:
-		return words
+norm_words = WordNormalizer(lowercase=not args.no_lowercase,
+	punctuation=None if args.punctuation else string.punctuation,
+	stopwords=stopset, ngrams=args.ngrams)
 
 #####################
 ## text extraction ##
@@ -131,6 +113,16 @@ if args.speed:
 	load_secs = time.time() - load_start
 	print('loading time: %dsecs' % load_secs)
 
+hasher = load_hash_config(args.classifier, args.hash_features)
+
+if hasher:
+	if args.trace:
+		print('hashing features into %d bits' % hasher.bits)
+	
+	featx = lambda words: hashed_bag_of_words(norm_words(words), hasher)
+else:
+	featx = lambda words: bag_of_words(norm_words(words))
+
 if args.metrics:
 	label_instance_function = {
 		'sents': corpus.category_sent_words,
@@ -153,19 +145,17 @@ if args.metrics:
 			stop = int(len(texts)*args.fraction)
 		
 		for t in itertools.islice(texts, stop):
-			feat = bag_of_words(norm_words(t))
+			feat = featx(t)
 			feats.append(feat)
 			test_feats.append((feat, label))
 	
-	print('accuracy:', accuracy(classifier, test_feats))
-	refsets, testsets = scoring.ref_test_sets(classifier, test_feats)
+	evaluation = scoring.evaluate(classifier, test_feats, labels)
+	print('accuracy:', evaluation.accuracy())
 	
 	for label in labels:
-		ref = refsets[label]
-		test = testsets[label]
-		print('%s precision: %f' % (label, precision(ref, test) or 0))
-		print('%s recall: %f' % (label, recall(ref, test) or 0))
-		print('%s f-measure: %f' % (label, f_measure(ref, test) or 0))
+		print('%s precision: %f' % (label, evaluation.precision(label)))
+		print('%s recall: %f' % (label, evaluation.recall(label)))
+		print('%s f-measure: %f' % (label, evaluation.f_measure(label)))
 else:
 	if args.instances == 'sents':
 		texts = categorized_corpus.sents()
@@ -178,7 +168,7 @@ else:
 		total = len(categorized_corpus.fileids())
 	
 	stop = int(total * args.fraction)
-	feats = (bag_of_words(norm_words(i)) for i in itertools.islice(texts, stop))
+	feats = (featx(i) for i in itertools.islice(texts, stop))
 
 label_counts = collections.defaultdict(int)
 
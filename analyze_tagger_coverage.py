@@ -4,6 +4,7 @@ import nltk.corpus, nltk.corpus.reader, nltk.data, nltk.tag, nltk.metrics
 from nltk.corpus.util import LazyCorpusLoader
 from nltk_trainer import load_corpus_reader, load_model, simplify_wsj_tag
 from nltk_trainer.tagging import taggers
+from nltk_trainer.tagging.batch import batch_retag_sents, batch_tag_sents
 
 ########################################
 ## command options & argument parsing ##
@@ -23,6 +24,9 @@ parser.add_argument('--trace', default=1, type=int,
 	help='How much trace output you want, defaults to 1. 0 is no trace output.')
 parser.add_argument('--metrics', action='store_true', default=False,
 	help='Use tagged sentences to determine tagger accuracy and tag precision & recall')
+parser.add_argument('--jobs', default=1, type=int,
+	help='''Number of worker processes to tag sentences with, defaults to %(default)d.
+Batches of sentences are tagged in parallel, and results are kept in corpus order.''')
 
 corpus_group = parser.add_argument_group('Corpus Reader Options')
 corpus_group.add_argument('--reader', default=None,
@@ -100,7 +104,7 @@ if args.metrics:
 		cutoff = int(math.ceil(len(tagged_sents) * args.fraction))
 		tagged_sents = tagged_sents[:cutoff]
 	
-	for tagged_sent in tagged_sents:
+	for tagged_sent, test_sent in batch_retag_sents(tagger, tagged_sents, jobs=args.jobs):
 		for word, tag in tagged_sent:
 			tags_actual[tag] += 1
 			tag_refs.append(tag)
@@ -109,7 +113,7 @@ if args.metrics:
 			if len(tag) > taglen:
 				taglen = len(tag)
 		
-		for word, tag in tagger.tag(nltk.tag.untag(tagged_sent)):
+		for word, tag in test_sent:
 			tags_found[tag] += 1
 			tag_test.append(tag)
 			tag_word_test[tag].add(word)
@@ -145,8 +149,8 @@ else:
 		cutoff = int(math.ceil(len(sents) * args.fraction))
 		sents = sents[:cutoff]
 	
-	for sent in sents:
-		for word, tag in tagger.tag(sent):
+	for tagged_sent in batch_tag_sents(tagger, sents, jobs=args.jobs):
+		for word, tag in tagged_sent:
 			tags_found[tag] += 1
 			
 			if len(tag) > taglen:
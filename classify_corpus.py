@@ -1,11 +1,11 @@
 #!/usr/bin/env python
-import argparse, itertools, operator, os, os.path, string
+import argparse, itertools, os, os.path, shutil, string
 import nltk.data
 from nltk.corpus import stopwords
 from nltk.tokenize import wordpunct_tokenize
-from nltk.util import ngrams
-from nltk_trainer import load_corpus_reader, join_words
-from nltk_trainer.classification.featx import bag_of_words
+from nltk_trainer import load_corpus_reader, join_words, process_pool
+from nltk_trainer.classification.featx import bag_of_words, hashed_bag_of_words, load_hash_config
+from nltk_trainer.normalize import WordNormalizer
 
 ########################################
 ## command options & argument parsing ##
@@ -27,6 +27,12 @@ parser.add_argument('--wordlist', default=None,
 	help='classified word list corpus for word/phrase classification')
 parser.add_argument('--threshold', type=float, default=0.9,
 	help='Minimum probability required to write classified instance')
+parser.add_argument('--batch-size', type=int, default=1000,
+	help='Number of instances to classify and write at once, defaults to %(default)d')
+parser.add_argument('--jobs', type=int, default=1,
+	help='''Number of worker processes to classify source corpus files with,
+	defaults to %(default)d. Each worker writes partial label files, which are
+	appended to the label files in fileid order when all workers are done.''')
 
 corpus_group = parser.add_argument_group('Corpus Reader Options')
 corpus_group.add_argument('--reader',
@@ -49,6 +55,9 @@ feat_group.add_argument('--filter-stopwords', default='no',
 	help='language stopwords to filter, defaults to "no" to keep stopwords')
 feat_group.add_argument('--punctuation', action='store_true', default=False,
 	help="don't strip punctuation")
+feat_group.add_argument('--hash-features', default=0, type=int, metavar='BITS',
+	help='''Hash words and ngrams into 2**BITS integer features. Only needed if
+	the classifier has no hashing config stored next to it.''')
 
 args = parser.parse_args()
 
@@ -68,31 +77,14 @@ if args.trace:
 ## text normalization ##
 ########################
 
-# TODO: copied from analyze_classifier_coverage, so abstract
-
 if args.filter_stopwords == 'no':
 	stopset = set()
 else:
 	stopset = set(stopwords.words(args.filter_stopwords))
 
-if not args.punctuation:
-	stopset |= set(string.punctuation)
-
-def norm_words(words):
-	if not args.no_lowercase:
-		words = [w.lower() for w in words]
-	
-	if not args.punctuation:
-		words = [w.strip(string.punctuation) for w in words]
-		words = [w for w in words if w]
-	
-	if stopset:
-		words = [w for w in words if w.lower() not in stopset]
-
-	if args.ngrams:
-		return reduce(operator.add, [words if n == 1 else ngrams(words, n) for n in args.ngrams])
-	else:
-		return words
+norm_words = WordNormalizer(lowercase=not args.no_lowercase,
+	punctuation=None if args.punctuation else string.punctuation,
+	stopwords=stopset, ngrams=args.ngrams)
 
 ##############
 ## classify ##
@@ -121,29 +113,103 @@ def label_filename(label):
 	return path
 
 labels = classifier.labels()
-label_files = dict([(l, open(label_filename(l), 'a')) for l in labels])
+label_paths = dict([(l, label_filename(l)) for l in labels])
 
 # TODO: create a nltk.corpus.writer framework with some initial CorpusWriter classes
 
-featx = lambda words: bag_of_words(norm_words(words))
+hasher = load_hash_config(args.classifier, args.hash_features) if args.classifier else None
 
-def classify_write(words):
-	feats = featx(words)
-	probs = classifier.prob_classify(feats)
-	label = probs.max()
+if hasher:
+	if args.trace:
+		print('hashing features into %d bits' % hasher.bits)
+	
+	featx = lambda words: hashed_bag_of_words(norm_words(words), hasher)
+else:
+	featx = lambda words: bag_of_words(norm_words(words))
+
+def fileid_instances(fileids):
+	if args.instances == 'paras':
+		for para in source_corpus.paras(fileids=fileids):
+			yield list(itertools.chain(*para))
+	else: # args.instances == 'sents'
+		for sent in source_corpus.sents(fileids=fileids):
+			yield sent
+
+def classify_batch(batch, label_texts):
+	probs = classifier.prob_classify_many([featx(words) for words in batch])
+	
+	for words, pd in zip(batch, probs):
+		label = pd.max()
+		
+		if pd.prob(label) >= args.threshold:
+			label_texts[label].append(join_words(words) + u'\n\n')
+
+def classify_write(fileids, suffix=''):
+	'''
+	Classify instances from fileids in batches, writing every batch of
+	instances that meet the threshold to the file for each label, with suffix
+	added to the filename. Label files are appended to, but suffixed shard
+	files are truncated, so stale shards from a crashed run aren't merged.
+	Returns the number of instances written.
+	'''
+	mode = 'w' if suffix else 'a'
+	label_files = dict([(l, open(path + suffix, mode)) for l, path in label_paths.items()])
+	instances = fileid_instances(fileids)
+	written = 0
 	
-	if probs.prob(label) >= args.threshold:
-		label_files[label].write(join_words(words) + u'\n\n')
+	try:
+		while True:
+			batch = list(itertools.islice(instances, args.batch_size))
+			
+			if not batch:
+				break
+			
+			label_texts = dict([(l, []) for l in labels])
+			classify_batch(batch, label_texts)
+			
+			for label, texts in label_texts.items():
+				if texts:
+					label_files[label].write(u''.join(texts))
+					written += len(texts)
+	finally:
+		for f in label_files.values():
+			f.close()
+	
+	return written
+
+def classify_shard(shard):
+	n, fileids = shard
+	return classify_write(fileids, suffix='.%d' % n)
 
 if args.trace:
 	print('classifying %s' % args.instances)
 
-if args.instances == 'paras':
-	for para in source_corpus.paras():
-		classify_write(list(itertools.chain(*para)))
-else: # args.instances == 'sents'
-	for sent in source_corpus.sents():
-		classify_write(sent)
+fileids = source_corpus.fileids()
+
+if args.jobs > 1 and len(fileids) > 1:
+	jobs = min(args.jobs, len(fileids))
+	# contiguous shards, so merged label files keep the fileid order
+	shards = [(n, fileids[n * len(fileids) // jobs:(n + 1) * len(fileids) // jobs])
+		for n in range(jobs)]
+	pool = process_pool(jobs)
+	
+	try:
+		written = sum(pool.map(classify_shard, shards, chunksize=1))
+	finally:
+		pool.terminate()
+	
+	for label, path in label_paths.items():
+		with open(path, 'a') as f:
+			for n, shard_fileids in shards:
+				with open('%s.%d' % (path, n)) as part:
+					shutil.copyfileobj(part, f)
+				
+				os.remove('%s.%d' % (path, n))
+else:
+	written = classify_write(fileids)
+
+if args.trace:
+	print('wrote %d classified %s' % (written, args.instances))
 
 
 # TODO: arg(s) to specify categorized word list corpus instead of classifier pickle
@@ -0,0 +1,35 @@
+#!/usr/bin/env python
+import argparse, os.path
+from nltk_trainer import dump_object, load_model
+from nltk_trainer.classification.naivebayes import compile_classifier
+
+########################################
+## command options & argument parsing ##
+########################################
+
+parser = argparse.ArgumentParser(description='Compile a pickled NLTK Classifier for faster classification')
+parser.add_argument('classifier', help='the pickled classifier to load and compile')
+parser.add_argument('filename', help='Filename to pickle the compiled classifier')
+parser.add_argument('--trace', default=1, type=int,
+	help='How much trace output you want, defaults to 1. 0 is no trace output.')
+
+args = parser.parse_args()
+
+#############
+## compile ##
+#############
+
+if args.trace:
+	print('loading %s' % args.classifier)
+
+classifier = load_model(args.classifier)
+
+if args.trace:
+	print('compiling %s' % classifier.__class__.__name__)
+
+compiled = compile_classifier(classifier)
+
+if compiled is classifier:
+	raise ValueError('%s has no NaiveBayes classifiers to compile' % classifier.__class__.__name__)
+
+dump_object(compiled, os.path.expanduser(args.filename), trace=args.trace)
@@ -1,6 +1,7 @@
-import os, os.path, re, time
+import multiprocessing, os, os.path, re, time
 import nltk.data
 from nltk.corpus.util import LazyCorpusLoader
+from nltk_trainer.cache import CachedCorpusReader
 from nltk_trainer.tagging.readers import NumberedTaggedSentCorpusReader
 
 try:
@@ -44,14 +45,34 @@ def load_model(path):
 	try:
 		return nltk.data.load(path)
 	except LookupError:
-		return pickle.load(open(os.path.expanduser(path)))
+		return pickle.load(open(os.path.expanduser(path), 'rb'))
+
+def process_pool(jobs, initializer=None, initargs=()):
+	'''Return a multiprocessing Pool of jobs worker processes. Workers are
+	forked where possible, so initargs such as corpus readers and functions
+	defined in scripts are inherited instead of pickled.'''
+	try:
+		context = multiprocessing.get_context('fork')
+	except (AttributeError, ValueError):
+		context = multiprocessing
+	
+	return context.Pool(jobs, initializer, initargs)
 
 def import_attr(path):
 	basepath, name = path.rsplit('.', 1)
 	mod = __import__(basepath, globals(), locals(), [name])
 	return getattr(mod, name)
 
-def load_corpus_reader(corpus, reader=None, fileids=None, sent_tokenizer=None, word_tokenizer=None, **kwargs):
+def load_corpus_reader(corpus, reader=None, fileids=None, sent_tokenizer=None, word_tokenizer=None, cache_dir=None, **kwargs):
+	real_corpus = _load_corpus_reader(corpus, reader, fileids, sent_tokenizer,
+		word_tokenizer, **kwargs)
+	
+	if cache_dir:
+		real_corpus = CachedCorpusReader(real_corpus, cache_dir)
+	
+	return real_corpus
+
+def _load_corpus_reader(corpus, reader=None, fileids=None, sent_tokenizer=None, word_tokenizer=None, **kwargs):
 	if corpus == 'timit':
 		# TODO: switch to universal
 		return LazyCorpusLoader('timit', NumberedTaggedSentCorpusReader,
@@ -0,0 +1,358 @@
+import functools, hashlib, os, os.path, tempfile
+from array import array
+
+try:
+	import cPickle as pickle
+except ImportError:
+	import pickle
+
+try:
+	from nltk.collections import LazyConcatenation, LazyMap
+except ImportError:
+	from nltk.util import LazyConcatenation, LazyMap
+
+try:
+	basestring = basestring
+except NameError:
+	basestring = str
+
+def object_path(obj):
+	'''Return a stable name for a class, function or instance, ignoring memory
+	addresses so it can be used in cache keys.
+	>>> object_path(None)
+	'None'
+	>>> object_path(array)
+	'array.array'
+	'''
+	if obj is None or isinstance(obj, (basestring, int, float, bool)):
+		return str(obj)
+	
+	if not hasattr(obj, '__name__'):
+		obj = obj.__class__
+	
+	return '%s.%s' % (getattr(obj, '__module__', ''), obj.__name__)
+
+def file_stamp(path):
+	'''Return (mtime, size) for a corpus file path pointer, or None if it
+	cannot be found on disk.'''
+	fname = getattr(path, 'path', None)
+	# ZipFilePathPointer has no path, but the zipfile mtime works just as well
+	if not fname and hasattr(path, 'zipfile'):
+		fname = path.zipfile.filename
+	
+	if not fname or not os.path.exists(fname):
+		return None
+	
+	st = os.stat(fname)
+	return (st.st_mtime, st.st_size)
+
+def dump_cache(obj, fname):
+	'''Pickle obj to a temporary file and rename, so concurrent runs never see
+	a partial cache file.'''
+	dirname = os.path.dirname(fname)
+	
+	if dirname and not os.path.exists(dirname):
+		os.makedirs(dirname)
+	
+	fd, tmpname = tempfile.mkstemp(dir=dirname or '.', suffix='.tmp')
+	
+	with os.fdopen(fd, 'wb') as f:
+		pickle.dump(obj, f, pickle.HIGHEST_PROTOCOL)
+	
+	os.rename(tmpname, fname)
+
+def load_cache(fname):
+	if not os.path.exists(fname):
+		return None
+	
+	with open(fname, 'rb') as f:
+		return pickle.load(f)
+
+##########################
+## token array encoding ##
+##########################
+
+def encode_tokens(nested, depth, tagged=False):
+	'''Encode nested lists of tokens as a string table plus integer arrays.
+	Token ids are stored in an array, and each level of nesting above the
+	tokens is stored as an array of end offsets into the level below.
+	>>> data = encode_tokens([['a', 'b'], ['b']], 2)
+	>>> data['strings'], list(data['ids']), [list(o) for o in data['offsets']]
+	(['a', 'b'], [0, 1, 1], [[2, 3]])
+	'''
+	index = {}
+	strings = []
+	ids = array('I')
+	tag_ids = array('I')
+	offsets = [array('I') for level in range(depth - 1)]
+	
+	def intern(s):
+		i = index.get(s)
+		
+		if i is None:
+			i = index[s] = len(strings)
+			strings.append(s)
+		
+		return i
+	
+	def flatten(seq, level):
+		if level == depth - 1:
+			for token in seq:
+				if tagged:
+					word, tag = token
+					ids.append(intern(word))
+					tag_ids.append(intern(tag))
+				else:
+					ids.append(intern(token))
+		else:
+			for sub in seq:
+				flatten(sub, level + 1)
+				
+				if level == depth - 2:
+					offsets[level].append(len(ids))
+				else:
+					offsets[level].append(len(offsets[level + 1]))
+	
+	flatten(nested, 0)
+	
+	return {
+		'strings': strings,
+		'ids': ids,
+		'tag_ids': tag_ids if tagged else None,
+		'offsets': offsets
+	}
+
+def decode_tokens(data):
+	'''Inverse of encode_tokens.
+	>>> decode_tokens(encode_tokens([[('a', 'DT')], [('b', 'NN'), ('a', 'DT')]], 2, tagged=True))
+	[[('a', 'DT')], [('b', 'NN'), ('a', 'DT')]]
+	'''
+	strings = data['strings']
+	items = [strings[i] for i in data['ids']]
+	
+	if data['tag_ids'] is not None:
+		items = list(zip(items, [strings[i] for i in data['tag_ids']]))
+	
+	for offsets in reversed(data['offsets']):
+		groups = []
+		start = 0
+		
+		for end in offsets:
+			groups.append(items[start:end])
+			start = end
+		
+		items = groups
+	
+	return items
+
+#########################
+## featureset encoding ##
+#########################
+
+def encode_featuresets(labeled_featuresets):
+	'''Encode (featureset, label) pairs as a feature name table plus integer
+	arrays of feature ids, featureset end offsets and feature values. Values
+	are omitted if they're all True, as in a bag of words.
+	>>> data = encode_featuresets([({'a': True, 'b': True}, 'pos'), ({'b': True}, 'neg')])
+	>>> data['fnames'], list(data['ids']), list(data['offsets']), data['values']
+	(['a', 'b'], [0, 1, 1], [2, 3], None)
+	'''
+	index = {}
+	fnames = []
+	ids = array('I')
+	offsets = array('I')
+	values = []
+	labels = []
+	
+	for featureset, label in labeled_featuresets:
+		for fname, fval in featureset.items():
+			i = index.get(fname)
+			
+			if i is None:
+				i = index[fname] = len(fnames)
+				fnames.append(fname)
+			
+			ids.append(i)
+			values.append(fval)
+		
+		offsets.append(len(ids))
+		labels.append(label)
+	
+	if all(v is True for v in values):
+		values = None
+	elif all(isinstance(v, int) and not isinstance(v, bool) for v in values):
+		values = array('l', values)
+	
+	return {
+		'fnames': fnames,
+		'ids': ids,
+		'offsets': offsets,
+		'values': values,
+		'labels': labels
+	}
+
+def decode_featuresets(data):
+	'''Inverse of encode_featuresets.
+	>>> decode_featuresets(encode_featuresets([({'a': 2}, 'pos'), ({}, 'neg'), ({'b': 1}, 'pos')]))
+	[({'a': 2}, 'pos'), ({}, 'neg'), ({'b': 1}, 'pos')]
+	'''
+	fnames = data['fnames']
+	ids = data['ids']
+	values = data['values']
+	labeled_featuresets = []
+	start = 0
+	
+	for end, label in zip(data['offsets'], data['labels']):
+		names = [fnames[i] for i in ids[start:end]]
+		
+		if values is None:
+			featureset = dict.fromkeys(names, True)
+		else:
+			featureset = dict(zip(names, values[start:end]))
+		
+		labeled_featuresets.append((featureset, label))
+		start = end
+	
+	return labeled_featuresets
+
+def cache_key_path(cache_dir, *parts):
+	'''Return a cache file path in cache_dir for a key made of parts'''
+	key = '\n'.join([repr(part) for part in parts])
+	digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+	return os.path.join(os.path.expanduser(cache_dir), digest[:2], '%s.cache' % digest)
+
+def reader_key(reader):
+	'''Return a key for the root, class and tokenizers of a corpus reader'''
+	parts = [
+		str(reader.root),
+		object_path(reader),
+		object_path(getattr(reader, '_word_tokenizer', None)),
+		object_path(getattr(reader, '_sent_tokenizer', None)),
+		object_path(getattr(reader, '_para_block_reader', None)),
+		repr(getattr(reader, '_encoding', None))
+	]
+	
+	return '\n'.join(parts)
+
+def unwrap_reader(reader):
+	'''Return the corpus reader wrapped by a CachedCorpusReader, or reader
+	itself if it isn't wrapped, for isinstance checks of the reader class'''
+	if isinstance(reader, CachedCorpusReader):
+		return reader.reader
+	else:
+		return reader
+
+def corpus_fingerprint(reader):
+	'''Return a key for a corpus reader plus the mtime, size and categories
+	of every corpus file, so it changes whenever the corpus does.'''
+	reader = unwrap_reader(reader)
+	parts = [reader_key(reader)]
+	
+	for fileid in reader.fileids():
+		parts.append('%s %r' % (fileid, file_stamp(reader.abspath(fileid))))
+		# categories can change with the same files, such as with a new cat_pattern
+		if hasattr(reader, 'categories'):
+			parts.append(repr(reader.categories(fileids=[fileid])))
+	
+	return hashlib.sha1('\n'.join(parts).encode('utf-8')).hexdigest()
+
+##########################
+## cached corpus reader ##
+##########################
+
+class CachedCorpusReader(object):
+	'''
+	Wraps a corpus reader and stores the tokens it produces on disk, one cache
+	file per method and fileid. Cache files are keyed on the corpus root,
+	reader class, tokenizers, method keyword arguments and each file's mtime
+	and size, so a changed file or tokenizer is transparently re-read.
+	
+	Like the views of NLTK corpus readers, the tokens are returned lazily,
+	loading one fileid at a time as they're read. All other attributes are
+	passed through to the wrapped reader, which unwrap_reader returns.
+	'''
+	# method name: nesting depth of token lists, or None to pickle as is
+	cached_methods = {
+		'words': 1,
+		'sents': 2,
+		'paras': 3,
+		'tagged_words': 1,
+		'tagged_sents': 2,
+		'tagged_paras': 3,
+		'chunked_words': None,
+		'chunked_sents': None,
+		'chunked_paras': None,
+		'parsed_sents': None
+	}
+	
+	def __init__(self, reader, cache_dir):
+		self.reader = reader
+		self.cache_dir = os.path.expanduser(cache_dir)
+		self._reader_key = None
+	
+	def __getattr__(self, name):
+		if name == 'reader':
+			raise AttributeError(name)
+		
+		attr = getattr(self.reader, name)
+		
+		if name in self.cached_methods and callable(attr):
+			return functools.partial(self._cached_call, name)
+		else:
+			return attr
+	
+	def __repr__(self):
+		return '<Cached %r in %s>' % (self.reader, self.cache_dir)
+	
+	def reader_key(self):
+		if self._reader_key is None:
+			self._reader_key = reader_key(self.reader)
+		
+		return self._reader_key
+	
+	def cache_path(self, method, fileid, kwargs):
+		stamp = file_stamp(self.reader.abspath(fileid))
+		
+		if stamp is None:
+			return None
+		
+		key = '\n'.join([self.reader_key(), method, fileid,
+			repr(sorted(kwargs.items())), repr(stamp)])
+		digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+		return os.path.join(self.cache_dir, digest[:2], '%s.cache' % digest)
+	
+	def _fileid_tokens(self, method, fileid, kwargs):
+		path = self.cache_path(method, fileid, kwargs)
+		data = path and load_cache(path)
+		depth = self.cached_methods[method]
+		
+		if data is not None:
+			return decode_tokens(data) if depth else data
+		
+		tokens = list(getattr(self.reader, method)(fileids=[fileid], **kwargs))
+		
+		if path:
+			if depth:
+				tagged = method.startswith('tagged_')
+				dump_cache(encode_tokens(tokens, depth, tagged=tagged), path)
+			else:
+				dump_cache(tokens, path)
+		
+		return tokens
+	
+	def _cached_call(self, method, fileids=None, categories=None, **kwargs):
+		if fileids is not None and categories is not None:
+			raise ValueError('Specify fileids or categories, not both')
+		elif categories is not None:
+			fileids = self.reader.fileids(categories=categories)
+		elif fileids is None:
+			fileids = self.reader.fileids()
+		elif isinstance(fileids, basestring):
+			fileids = [fileids]
+		
+		load = lambda fileid: self._fileid_tokens(method, fileid, kwargs)
+		return LazyConcatenation(LazyMap(load, list(fileids)))
+
+if __name__ == '__main__':
+	import doctest
+	doctest.testmod()
@@ -1,11 +1,14 @@
-from nltk.classify import DecisionTreeClassifier, MaxentClassifier, NaiveBayesClassifier, megam
+from nltk.classify import MaxentClassifier, NaiveBayesClassifier, megam
 from nltk_trainer import basestring
+from nltk_trainer.classification.decisiontree import train_decision_tree
+from nltk_trainer.classification.maxent import train_lbfgs_maxent
 from nltk_trainer.classification.multi import AvgProbClassifier
+from nltk_trainer.classification.stream import NaiveBayesTrainer
 
-classifier_choices = ['NaiveBayes', 'DecisionTree', 'Maxent'] + MaxentClassifier.ALGORITHMS
+classifier_choices = ['NaiveBayes', 'DecisionTree', 'Maxent'] + MaxentClassifier.ALGORITHMS + ['LBFGS']
 
-dense_classifiers = set(['ExtraTreesClassifier', 'GradientBoostingClassifier',
-		'RandomForestClassifier', 'GaussianNB', 'DecisionTreeClassifier'])
+# tree estimators take CSR matrices directly, so only these need dense rows
+dense_classifiers = set(['GaussianNB'])
 verbose_classifiers = set(['RandomForestClassifier', 'SVC'])
 
 try:
@@ -16,17 +19,18 @@ except:
 	pass
 
 try:
-	from nltk.classify import scikitlearn
+	import numpy
 	from sklearn.feature_extraction.text import TfidfTransformer
 	from sklearn.pipeline import Pipeline
 	from sklearn import ensemble, feature_selection, linear_model, naive_bayes, neighbors, svm, tree
+	from nltk_trainer.classification.sparse import ColumnIndex, PartialFitTrainer, SparseSklearnClassifier
 	
 	classifiers = [
 		ensemble.ExtraTreesClassifier,
 		ensemble.GradientBoostingClassifier,
 		ensemble.RandomForestClassifier,
 		linear_model.LogisticRegression,
-		#linear_model.SGDClassifier, # NOTE: this seems terrible, but could just be the options
+		linear_model.SGDClassifier,
 		naive_bayes.BernoulliNB,
 		naive_bayes.GaussianNB,
 		naive_bayes.MultinomialNB,
@@ -47,9 +51,13 @@ except ImportError as exc:
 
 def add_maxent_args(parser):
 	maxent_group = parser.add_argument_group('Maxent Classifier',
-		'These options only apply when a Maxent classifier is chosen.')
-	maxent_group.add_argument('--max_iter', default=10, type=int,
-		help='maximum number of training iterations, defaults to %(default)d')
+		'''These options only apply when a Maxent classifier is chosen. LBFGS
+		trains a Maxent classifier with NumPy and L-BFGS, and only uses
+		max_iter and l2_reg, since it stops on its own when converged.''')
+	maxent_group.add_argument('--max_iter', default=None, type=int,
+		help='maximum number of training iterations, defaults to 10, or 100 for LBFGS')
+	maxent_group.add_argument('--l2_reg', default=0, type=float,
+		help='L2 regularization strength for LBFGS, default is %(default)d for no regularization')
 	maxent_group.add_argument('--min_ll', default=0, type=float,
 		help='stop classification when average log-likelihood is less than this, default is %(default)d')
 	maxent_group.add_argument('--min_lldelta', default=0.1, type=float,
@@ -73,6 +81,8 @@ sklearn_kwargs = {
 	'RandomForestClassifier': ['criterion', 'max_feats', 'depth_cutoff', 'n_estimators'],
 	# linear_model
 	'LogisticRegression': ['C','penalty'],
+	# alpha is for naive bayes smoothing, and is much too big for SGD
+	'SGDClassifier': ['penalty'],
 	# naive_bayes
 	'BernoulliNB': ['alpha'],
 	'MultinomialNB': ['alpha'],
@@ -133,6 +143,107 @@ def make_sklearn_classifier(algo, args):
 	
 	return sklearn_classifiers[name](**kwargs)
 
+def sklearn_dtype(args):
+	value_type = getattr(args, 'value_type', 'bool')
+	tfidf = getattr(args, 'tfidf', None)
+	
+	if value_type == 'bool' and not tfidf:
+		return bool
+	elif value_type == 'int' and not tfidf:
+		return int
+	else:
+		return numpy.float32
+
+def make_incremental_trainer(args, labels):
+	'''
+	Return a trainer with an update() method to train on each batch of
+	labeled featuresets, and a classifier() method to get the classifier
+	trained so far. Only NaiveBayes, and sklearn classifiers that have
+	partial_fit and take sparse matrices, can be trained incrementally.
+	'''
+	if isinstance(args.classifier, basestring):
+		algos = [args.classifier]
+	else:
+		algos = args.classifier
+	
+	if len(algos) != 1:
+		raise ValueError('only 1 classifier can be trained incrementally')
+	
+	algo = algos[0]
+	
+	if algo == 'NaiveBayes':
+		return NaiveBayesTrainer()
+	elif algo.startswith('sklearn.'):
+		estimator = make_sklearn_classifier(algo, args)
+		
+		if not hasattr(estimator, 'partial_fit') or algo.split('.', 1)[1] in dense_classifiers:
+			raise ValueError('classifier %s cannot be trained incrementally' % algo)
+		elif not getattr(args, 'hash_features', 0):
+			raise ValueError('classifier %s needs hashed features to be trained incrementally' % algo)
+		
+		index = ColumnIndex(2 ** args.hash_features)
+		return PartialFitTrainer(estimator, labels, index, dtype=sklearn_dtype(args))
+	else:
+		raise ValueError('classifier %s cannot be trained incrementally' % algo)
+
+def sklearn_train_kwargs(algo, args):
+	'''Return the SparseSklearnClassifier train kwargs for a sklearn algo'''
+	# TODO: support many options for building an estimator pipeline
+	pipe = [('classifier', make_sklearn_classifier(algo, args))]
+	tfidf = getattr(args, 'tfidf', None)
+	penalty = getattr(args, 'penalty', None)
+	
+	if tfidf and penalty:
+		if args.trace:
+			print('using tfidf transformer with norm %s' % penalty)
+		
+		pipe.insert(0, ('tfidf', TfidfTransformer(norm=penalty)))
+	
+	sparse = pipe[-1][1].__class__.__name__ not in dense_classifiers
+	
+	if not sparse and args.trace:
+		print('using dense row batches')
+	
+	dtype = sklearn_dtype(args)
+	
+	if args.trace:
+		print('using dtype %s' % dtype.__name__)
+	
+	return {
+		# a bare estimator keeps partial_fit for dense row batches
+		'estimator': Pipeline(pipe) if len(pipe) > 1 else pipe[0][1],
+		'dtype': dtype,
+		'dense': not sparse
+	}
+
+def make_id_trainer(args, vocab, idset=None):
+	'''
+	Return a function to train a sklearn classifier on (id array, label)
+	pairs of vocab, like the function from make_classifier_builder, but
+	building the matrix straight from the ids. Only a single sklearn
+	classifier can be trained on ids.
+	'''
+	if isinstance(args.classifier, basestring):
+		algos = [args.classifier]
+	else:
+		algos = args.classifier
+	
+	if len(algos) != 1 or not algos[0].startswith('sklearn.'):
+		raise ValueError('only 1 sklearn classifier can be trained on ids')
+	
+	algo = algos[0]
+	train_kwargs = sklearn_train_kwargs(algo, args)
+	binary = getattr(args, 'value_type', 'bool') == 'bool'
+	
+	def trainf(train_ids):
+		if args.trace:
+			print('training %s classifier' % algo)
+		
+		return SparseSklearnClassifier.train_ids(train_ids, vocab=vocab,
+			idset=idset, binary=binary, **train_kwargs)
+	
+	return trainf
+
 def make_classifier_builder(args):
 	if isinstance(args.classifier, basestring):
 		algos = [args.classifier]
@@ -149,7 +260,7 @@ def make_classifier_builder(args):
 		classifier_train_kwargs = {}
 		
 		if algo == 'DecisionTree':
-			classifier_train = DecisionTreeClassifier.train
+			classifier_train = train_decision_tree
 			classifier_train_kwargs['binary'] = False
 			classifier_train_kwargs['entropy_cutoff'] = args.entropy_cutoff
 			classifier_train_kwargs['depth_cutoff'] = args.depth_cutoff
@@ -159,36 +270,18 @@ def make_classifier_builder(args):
 			classifier_train = NaiveBayesClassifier.train
 		elif algo == 'Svm':
 			classifier_train = SvmClassifier.train
-		elif algo.startswith('sklearn.'):
-			# TODO: support many options for building an estimator pipeline
-			pipe = [('classifier', make_sklearn_classifier(algo, args))]
-			tfidf = getattr(args, 'tfidf', None)
-			penalty = getattr(args, 'penalty', None)
-			
-			if tfidf and penalty:
-				if args.trace:
-					print('using tfidf transformer with norm %s' % penalty)
-				
-				pipe.insert(0, ('tfidf', TfidfTransformer(norm=penalty)))
-			
-			sparse = pipe[-1][1].__class__.__name__ not in dense_classifiers
-			
-			if not sparse and args.trace:
-				print('using dense matrix')
-			
-			value_type = getattr(args, 'value_type', 'bool')
+		elif algo == 'LBFGS':
+			classifier_train = train_lbfgs_maxent
+			# unless given, use the default of train_lbfgs_maxent, since L-BFGS
+			# needs more iterations to converge than GIS or IIS
+			if args.max_iter is not None:
+				classifier_train_kwargs['max_iter'] = args.max_iter
 			
-			if value_type == 'bool' and not tfidf:
-				dtype = bool
-			elif value_type == 'int' and not tfidf:
-				dtype = int
-			else:
-				dtype = float
-			
-			if args.trace:
-				print('using dtype %s' % dtype.__name__)
-			
-			classifier_train = scikitlearn.SklearnClassifier(Pipeline(pipe), dtype=dtype, sparse=sparse).train
+			classifier_train_kwargs['l2_reg'] = getattr(args, 'l2_reg', 0)
+			classifier_train_kwargs['trace'] = args.trace
+		elif algo.startswith('sklearn.'):
+			classifier_train = SparseSklearnClassifier.train
+			classifier_train_kwargs = sklearn_train_kwargs(algo, args)
 		else:
 			if algo != 'Maxent':
 				classifier_train_kwargs['algorithm'] = algo
@@ -197,7 +290,7 @@ def make_classifier_builder(args):
 					megam.config_megam()
 			
 			classifier_train = MaxentClassifier.train
-			classifier_train_kwargs['max_iter'] = args.max_iter
+			classifier_train_kwargs['max_iter'] = args.max_iter if args.max_iter is not None else 10
 			classifier_train_kwargs['min_ll'] = args.min_ll
 			classifier_train_kwargs['min_lldelta'] = args.min_lldelta
 			classifier_train_kwargs['trace'] = args.trace
@@ -1,4 +1,5 @@
 import itertools
+from nltk_trainer import process_pool
 
 def category_words(categorized_corpus):
 	for category in categorized_corpus.categories():
@@ -15,7 +16,8 @@ def category_para_words(categorized_corpus, category):
 		yield itertools.chain(*para)
 
 def category_file_words(categorized_corpus, category):
-	for fileid in category_fileidset(categorized_corpus, category):
+	# sorted like the fileids of sents and paras, so fraction splits are reproducible
+	for fileid in sorted(category_fileidset(categorized_corpus, category)):
 		yield categorized_corpus.words(fileids=[fileid])
 
 ## multi category corpus ##
@@ -39,6 +41,79 @@ def multi_category_file_words(categorized_corpus, fileid_prefix=''):
 	for fileid, categories in corpus_fileid_categories(categorized_corpus, fileid_prefix):
 		yield categorized_corpus.words(fileids=[fileid]), categories
 
+#########################
+## parallel extraction ##
+#########################
+
+def fileid_instances(categorized_corpus, fileid, instances='files'):
+	'''Return a list of word lists, one for each sent, para or file instance in fileid'''
+	if instances == 'sents':
+		return [list(sent) for sent in categorized_corpus.sents(fileids=[fileid])]
+	elif instances == 'paras':
+		return [list(itertools.chain(*para)) for para in categorized_corpus.paras(fileids=[fileid])]
+	else:
+		return [list(categorized_corpus.words(fileids=[fileid]))]
+
+# set in each worker process by _init_worker
+_worker_args = None
+
+def _init_worker(categorized_corpus, instances, normf):
+	global _worker_args
+	_worker_args = (categorized_corpus, instances, normf)
+
+def _worker_fileid_instances(fileid):
+	categorized_corpus, instances, normf = _worker_args
+	texts = fileid_instances(categorized_corpus, fileid, instances)
+	
+	if normf:
+		texts = [list(normf(words)) for words in texts]
+	
+	return texts
+
+def parallel_fileid_instances(categorized_corpus, fileids, instances='files', normf=None, jobs=2):
+	'''
+	Yield a list of instances for each fileid, in the same order as fileids.
+	Reading the fileid and normalizing each instance with normf is done
+	across a pool of jobs worker processes.
+	'''
+	pool = process_pool(jobs, _init_worker, (categorized_corpus, instances, normf))
+	
+	try:
+		for texts in pool.imap(_worker_fileid_instances, fileids):
+			yield texts
+	finally:
+		pool.terminate()
+
+def parallel_category_instances(categorized_corpus, categories, instances='files', normf=None, jobs=2):
+	'''
+	Yield category, instance tuples for each category, reading the sorted
+	fileids of every category in one worker pool. Instances are yielded in
+	the same order as from the category_*_words functions, so fraction
+	splits are the same no matter how many jobs there are.
+	'''
+	category_fileids = []
+	
+	for category in categories:
+		for fileid in sorted(category_fileidset(categorized_corpus, category)):
+			category_fileids.append((category, fileid))
+	
+	fileids = [fileid for category, fileid in category_fileids]
+	results = parallel_fileid_instances(categorized_corpus, fileids, instances, normf, jobs)
+	
+	for (category, fileid), texts in zip(category_fileids, results):
+		for text in texts:
+			yield category, text
+
+def parallel_multi_category_instances(categorized_corpus, fileid_prefix='', instances='files', normf=None, jobs=2):
+	'''Parallel version of the multi_category_*_words functions'''
+	fileid_categories = list(corpus_fileid_categories(categorized_corpus, fileid_prefix))
+	fileids = [fileid for fileid, categories in fileid_categories]
+	results = parallel_fileid_instances(categorized_corpus, fileids, instances, normf, jobs)
+	
+	for (fileid, categories), texts in zip(fileid_categories, results):
+		for text in texts:
+			yield text, categories
+
 ################
 ## csv output ##
 ################
@@ -0,0 +1,110 @@
+import collections
+from nltk.classify import DecisionTreeClassifier
+from nltk.probability import FreqDist, MLEProbDist, entropy
+from nltk_trainer import iteritems
+
+def best_stump(labeled_featuresets, verbose=False):
+	'''
+	Return the same stump as DecisionTreeClassifier.best_stump, but instead of
+	classifying every featureset once for every feature name, count the labels
+	of each feature value in one pass, so the error of every stump comes from
+	the counts. Values of None, including missing features, are counted as
+	the label totals minus the counts of every other value.
+	'''
+	# built in the same order as in DecisionTreeClassifier.train, so ties are
+	# broken by the same iteration order
+	feature_names = set()
+	label_counts = collections.Counter()
+	value_label_counts = collections.defaultdict(dict)
+	
+	for featureset, label in labeled_featuresets:
+		label_counts[label] += 1
+		
+		for fname, fval in iteritems(featureset):
+			feature_names.add(fname)
+			
+			if fval is not None:
+				counts = value_label_counts[fname].get(fval)
+				
+				if counts is None:
+					counts = value_label_counts[fname][fval] = collections.Counter()
+				
+				counts[label] += 1
+	
+	n = len(labeled_featuresets)
+	best_errors = n - max(label_counts.values())
+	best_fname = None
+	
+	for fname in feature_names:
+		correct = 0
+		present = collections.Counter()
+		
+		for counts in value_label_counts[fname].values():
+			correct += max(counts.values())
+			present.update(counts)
+		
+		if sum(present.values()) < n:
+			correct += max([count - present[label] for label, count in iteritems(label_counts)])
+		
+		if n - correct < best_errors:
+			best_errors = n - correct
+			best_fname = fname
+	
+	if best_fname is None:
+		stump = DecisionTreeClassifier.leaf(labeled_featuresets)
+	else:
+		stump = DecisionTreeClassifier.stump(best_fname, labeled_featuresets)
+	
+	if verbose:
+		print('best stump for %6d toks uses %-20s err=%6.4f' % (n, best_fname, float(best_errors) / n))
+	
+	return stump
+
+def _train(labeled_featuresets, entropy_cutoff, depth_cutoff, support_cutoff, verbose):
+	tree = best_stump(labeled_featuresets, verbose)
+	_refine(tree, labeled_featuresets, entropy_cutoff, depth_cutoff - 1, support_cutoff, verbose)
+	return tree
+
+def _refine(tree, labeled_featuresets, entropy_cutoff, depth_cutoff, support_cutoff, verbose):
+	if len(labeled_featuresets) <= support_cutoff or tree._fname is None or depth_cutoff <= 0:
+		return
+	# split the featuresets by value in one pass, instead of once for each value
+	fval_featuresets = collections.defaultdict(list)
+	
+	for featureset, label in labeled_featuresets:
+		fval_featuresets[featureset.get(tree._fname)].append((featureset, label))
+	
+	for fval in tree._decisions:
+		featuresets = fval_featuresets[fval]
+		label_freqs = FreqDist([label for (featureset, label) in featuresets])
+		
+		if entropy(MLEProbDist(label_freqs)) > entropy_cutoff:
+			tree._decisions[fval] = _train(featuresets, entropy_cutoff,
+				depth_cutoff, support_cutoff, verbose)
+
+def train_decision_tree(labeled_featuresets, entropy_cutoff=0.05, depth_cutoff=100,
+		support_cutoff=10, binary=False, verbose=False):
+	'''
+	Train the same tree of DecisionTreeClassifiers as
+	DecisionTreeClassifier.train, but choose the best stump at each node from
+	label counts of every feature value, so each node takes one pass over its
+	featuresets instead of one pass for every feature name. Binary trees are
+	still trained by DecisionTreeClassifier.train.
+	
+	>>> train = [({'a': 1, 'b': 1}, 'x'), ({'a': 1}, 'x'), ({'b': 1}, 'y'), ({'c': 1}, 'y')]
+	>>> tree = train_decision_tree(train, support_cutoff=0)
+	>>> tree.pretty_format() == DecisionTreeClassifier.train(train, support_cutoff=0).pretty_format()
+	True
+	>>> tree.classify_many([{'a': 1}, {'b': 1}])
+	['x', 'y']
+	'''
+	if binary:
+		return DecisionTreeClassifier.train(labeled_featuresets, entropy_cutoff,
+			depth_cutoff, support_cutoff, binary=True, verbose=verbose)
+	
+	return _train(list(labeled_featuresets), entropy_cutoff, depth_cutoff,
+		support_cutoff, verbose)
+
+if __name__ == '__main__':
+	import doctest
+	doctest.testmod()
@@ -1,5 +1,37 @@
-import math
+import collections, itertools, json, math, os.path, zlib
+from array import array
+import nltk.data
 from nltk import probability
+from nltk_trainer import iteritems
+from nltk_trainer.memo import LRUCache
+
+try:
+	xrange = xrange
+except NameError:
+	xrange = range
+
+def ngram_features(words, ngrams):
+	'''
+	Yield words and n-gram tuples of words for each n in ngrams, in a single
+	pass over words with a sliding window, so words can be any iteration and
+	nothing is copied. Unigrams are the words themselves.
+	
+	>>> list(ngram_features(['a', 'b', 'c'], [1, 2]))
+	['a', 'b', ('a', 'b'), 'c', ('b', 'c')]
+	>>> bag_of_words(ngram_features(iter(['a', 'b', 'c']), [3]))
+	{('a', 'b', 'c'): True}
+	'''
+	window = collections.deque(maxlen=max(ngrams))
+	
+	for word in words:
+		window.append(word)
+		size = len(window)
+		
+		for n in ngrams:
+			if n == 1:
+				yield word
+			elif n <= size:
+				yield tuple(itertools.islice(window, size - n, size))
 
 def bag_of_words(words):
 	return dict([(word, True) for word in words])
@@ -13,6 +45,143 @@ def word_counts(words):
 def word_counts_in_set(words, wordset):
 	return word_counts((w for w in words if w in wordset))
 
+def bag_of_ids(ids, vocab):
+	'''Like bag_of_words, but for an array of ids from a Vocabulary.
+	Featureset keys are the shared vocabulary tokens, so models trained on ids
+	work with featuresets from bag_of_words.'''
+	tokens = vocab.tokens
+	return dict([(tokens[i], True) for i in ids])
+
+def bag_of_ids_in_set(ids, idset, vocab):
+	return bag_of_ids(set(ids) & idset, vocab)
+
+def id_counts(ids, vocab):
+	tokens = vocab.tokens
+	# count tokens instead of ids, since hashed tokens can collide
+	return dict(collections.Counter([tokens[i] for i in ids]))
+
+def id_counts_in_set(ids, idset, vocab):
+	return id_counts((i for i in ids if i in idset), vocab)
+
+######################
+## feature hashing ##
+######################
+
+class FeatureHasher(object):
+	'''
+	Maps tokens, which can be words or n-gram tuples, to integer features in
+	range(2 ** bits), so the number of features is fixed no matter how many
+	unique tokens there are. Uses crc32, which unlike hash() is the same in
+	every process and python version, so features match between training and
+	classification.
+	
+	>>> hasher = FeatureHasher(8)
+	>>> hasher('cat'), hasher(('the', 'cat')), hasher('cat') == hasher(u'cat')
+	(168, 246, True)
+	'''
+	def __init__(self, bits=18, cache_size=100000):
+		self.bits = bits
+		self.mask = (1 << bits) - 1
+		self.cache = LRUCache(cache_size)
+	
+	def hash(self, token):
+		'''Hash token without caching'''
+		if isinstance(token, tuple):
+			token = u'\x00'.join(token)
+		
+		if not isinstance(token, bytes):
+			token = token.encode('utf-8')
+		
+		return zlib.crc32(token) & self.mask
+	
+	def __call__(self, token):
+		return self.cache.lookup(token, self.hash)
+
+class HashedVocabulary(object):
+	'''
+	Stands in for a Vocabulary when features are hashed. The id of a token is
+	its hash, so instances are encoded without interning any tokens, and each
+	id is its own feature, for use with bag_of_ids and id_counts.
+	
+	>>> vocab = HashedVocabulary(FeatureHasher(8))
+	>>> list(vocab.encode(['the', 'cat', 'the']))
+	[230, 168, 230]
+	>>> len(vocab), vocab.tokens[168]
+	(256, 168)
+	'''
+	typecode = 'I'
+	
+	def __init__(self, hasher):
+		self.hasher = hasher
+		self.tokens = xrange(1 << hasher.bits)
+	
+	def __len__(self):
+		return len(self.tokens)
+	
+	def encode(self, tokens):
+		'''Return an array of hashed ids for an iteration of tokens'''
+		hasher = self.hasher
+		return array(self.typecode, [hasher(token) for token in tokens])
+
+def hashed_bag_of_words(words, hasher):
+	'''
+	>>> hashed_bag_of_words(['the', 'cat', 'the'], FeatureHasher(8))
+	{230: True, 168: True}
+	'''
+	return bag_of_words([hasher(w) for w in words])
+
+def hashed_word_counts(words, hasher):
+	return dict(collections.Counter([hasher(w) for w in words]))
+
+def hash_config_path(fname):
+	'''Return the path of the hashing config stored next to a pickled model'''
+	return '%s.hashing.json' % os.path.splitext(fname)[0]
+
+def dump_hash_config(hasher, fname, trace=1):
+	'''Store the hashing config next to the pickled model in fname'''
+	path = hash_config_path(fname)
+	
+	if trace:
+		print('dumping hashing config to %s' % path)
+	
+	with open(path, 'w') as f:
+		json.dump({'hash': 'crc32', 'bits': hasher.bits}, f)
+
+def load_hash_config(path, bits=0):
+	'''
+	Return a FeatureHasher from the hashing config stored next to the model
+	at path, which can be relative to a nltk_data directory, or None if the
+	model was not trained with hashed features. If bits is given, it must
+	match the stored config, and is used if there is no stored config.
+	'''
+	fname = os.path.expanduser(path)
+	config = None
+	
+	if not os.path.exists(fname):
+		try:
+			fname = nltk.data.find(path).path
+		except (LookupError, AttributeError):
+			fname = None
+	
+	if fname and os.path.exists(hash_config_path(fname)):
+		config_path = hash_config_path(fname)
+		
+		with open(config_path) as f:
+			config = json.load(f)
+		
+		if config.get('hash') != 'crc32':
+			raise ValueError('unknown feature hash %s in %s' % (config.get('hash'), config_path))
+		
+		if bits and bits != config['bits']:
+			raise ValueError('%s was trained with %d hash bits, not %d' % (path, config['bits'], bits))
+		
+		bits = config['bits']
+	
+	if bits:
+		return FeatureHasher(bits)
+	else:
+		return None
+
 def train_test_feats(label, instances, featx=bag_of_words, fraction=0.75):
 	labeled_instances = [(featx(i), label) for i in instances]
 	
@@ -0,0 +1,105 @@
+import math
+import numpy, scipy.sparse
+from scipy.optimize import minimize
+from scipy.special import logsumexp
+from nltk.classify.maxent import BinaryMaxentFeatureEncoding, MaxentClassifier
+
+def label_feature_matrices(encoding, featuresets):
+	'''
+	Return a list with a CSR matrix for each of encoding.labels(), where row i
+	is the encoded feature vector of (featuresets[i], label).
+	'''
+	matrices = []
+	
+	for label in encoding.labels():
+		indptr = [0]
+		indices = []
+		data = []
+		
+		for featureset in featuresets:
+			for fid, fval in encoding.encode(featureset, label):
+				indices.append(fid)
+				data.append(fval)
+			
+			indptr.append(len(indices))
+		
+		shape = (len(featuresets), encoding.length())
+		matrices.append(scipy.sparse.csr_matrix((numpy.array(data, dtype=numpy.float64),
+			indices, indptr), shape=shape))
+	
+	return matrices
+
+def train_lbfgs_maxent(train_toks, max_iter=100, l2_reg=0.0, trace=1, encoding=None,
+		labels=None, count_cutoff=0):
+	'''
+	Train a MaxentClassifier by minimizing the negative log likelihood of
+	train_toks, plus l2_reg / 2 times the squared weights, with L-BFGS. The
+	encoded features of every instance and label are built once as sparse
+	matrices, so each iteration is a few matrix products. The result is a
+	standard MaxentClassifier with a BinaryMaxentFeatureEncoding.
+	
+	>>> train = [({'a': True}, 'x'), ({'a': True, 'b': True}, 'x'), ({'b': True}, 'y'), ({'c': True}, 'y')]
+	>>> me = train_lbfgs_maxent(train, trace=0)
+	>>> me.classify_many([{'a': True}, {'b': True}, {'c': True}])
+	['x', 'y', 'y']
+	'''
+	train_toks = list(train_toks)
+	
+	if encoding is None:
+		encoding = BinaryMaxentFeatureEncoding.train(train_toks,
+			count_cutoff=count_cutoff, labels=labels)
+	
+	featuresets, gold = zip(*train_toks)
+	label_index = dict([(label, j) for j, label in enumerate(encoding.labels())])
+	y = numpy.array([label_index[label] for label in gold])
+	rows = numpy.arange(len(y))
+	matrices = label_feature_matrices(encoding, featuresets)
+	# feature counts for the correct labels, which the model's expected counts must match
+	empirical = numpy.zeros(encoding.length())
+	
+	for j, X in enumerate(matrices):
+		empirical += numpy.asarray(X[y == j].sum(axis=0)).ravel()
+	
+	# average log likelihood of the last weights, and the number of iterations, for tracing
+	state = {'ll': 0.0, 'iterations': 0}
+	
+	def objective(weights):
+		scores = numpy.column_stack([X.dot(weights) for X in matrices])
+		logz = logsumexp(scores, axis=1)
+		ll = scores[rows, y].sum() - logz.sum()
+		probs = numpy.exp(scores - logz[:, numpy.newaxis])
+		expected = numpy.zeros(encoding.length())
+		
+		for j, X in enumerate(matrices):
+			expected += X.T.dot(probs[:, j])
+		
+		state['ll'] = ll / len(y)
+		loss = -ll
+		grad = expected - empirical
+		
+		if l2_reg:
+			loss += 0.5 * l2_reg * weights.dot(weights)
+			grad += l2_reg * weights
+		
+		return loss, grad
+	
+	def callback(weights):
+		state['iterations'] += 1
+		
+		if trace > 2:
+			print('  iteration %d average log likelihood %.5f' % (state['iterations'], state['ll']))
+	
+	if trace > 2:
+		print('  ==> Training with L-BFGS (max %d iterations)' % max_iter)
+	
+	result = minimize(objective, numpy.zeros(encoding.length()), jac=True,
+		method='L-BFGS-B', callback=callback, options={'maxiter': max_iter})
+	
+	if trace > 1:
+		print('  L-BFGS stopped after %d iterations: %s' % (result.nit, result.message))
+	# MaxentClassifier weights are log base 2
+	return MaxentClassifier(encoding, result.x / math.log(2))
+
+if __name__ == '__main__':
+	import doctest
+	doctest.testmod()
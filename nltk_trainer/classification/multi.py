@@ -1,7 +1,8 @@
 import collections, copy, itertools
+import numpy
 from nltk.classify import ClassifierI, MultiClassifierI
 from nltk.probability import DictionaryProbDist, MutableProbDist
-from nltk_trainer import iteritems
+from nltk_trainer import iteritems, process_pool
 
 class HierarchicalClassifier(ClassifierI):
 	def __init__(self, root, label_classifiers):
@@ -37,6 +38,86 @@ class HierarchicalClassifier(ClassifierI):
 				mult.update(sample, pd.prob(sample), log=False)
 		
 		return mult
+	
+	def classify_many(self, featuresets):
+		featuresets = list(featuresets)
+		labels = self.root.classify_many(featuresets)
+		label_indexes = collections.defaultdict(list)
+		
+		for i, label in enumerate(labels):
+			if label in self.label_classifiers:
+				label_indexes[label].append(i)
+		
+		for label, indexes in iteritems(label_indexes):
+			sublabels = self.label_classifiers[label].classify_many([featuresets[i] for i in indexes])
+			
+			for i, sublabel in zip(indexes, sublabels):
+				labels[i] = sublabel
+		
+		return labels
+	
+	def prob_classify_many(self, featuresets):
+		featuresets = list(featuresets)
+		pdists = [self.root.prob_classify_many(featuresets)]
+		
+		for classifier in self.label_classifiers.values():
+			pdists.append(classifier.prob_classify_many(featuresets))
+		
+		mults = []
+		
+		for probs, subprobs in zip(pdists[0], zip(*pdists[1:])):
+			mult = MutableProbDist(probs, self.labels(), store_logs=False)
+			
+			for pd in subprobs:
+				for sample in pd.samples():
+					mult.update(sample, pd.prob(sample), log=False)
+			
+			mults.append(mult)
+		
+		return mults
+
+def batch_label_probs(classifier, featuresets, labels):
+	'''
+	Return a pair of arrays with a row for each featureset and a column for
+	each of labels: the probabilities from classifier.prob_classify_many(),
+	and whether each label was given a probability. If the classifier can't
+	do prob_classify (like DecisionTree), the label from classify_many()
+	gets 100% probability. Labels not in labels are ignored.
+	'''
+	index = dict([(label, j) for j, label in enumerate(labels)])
+	shape = (len(featuresets), len(labels))
+	probs = numpy.zeros(shape)
+	given = numpy.zeros(shape, dtype=bool)
+	
+	try:
+		if hasattr(classifier, 'batch_probs'):
+			# compiled classifiers can give an array of probabilities directly
+			batch = classifier.batch_probs(featuresets)
+			cols = [index.get(label) for label in classifier.labels()]
+			known = [j for j, col in enumerate(cols) if col is not None]
+			probs[:, [cols[j] for j in known]] = batch[:, known]
+			given[:, [cols[j] for j in known]] = True
+			return probs, given
+		
+		for i, pd in enumerate(classifier.prob_classify_many(featuresets)):
+			for label in pd.samples():
+				j = index.get(label)
+				
+				if j is not None:
+					probs[i, j] = pd.prob(label)
+					given[i, j] = True
+	except NotImplementedError:
+		probs[:] = 0
+		given[:] = False
+		
+		for i, label in enumerate(classifier.classify_many(featuresets)):
+			j = index.get(label)
+			
+			if j is not None:
+				probs[i, j] = 1
+				given[i, j] = True
+	
+	return probs, given
 
 class AvgProbClassifier(ClassifierI):
 	def __init__(self, classifiers):
@@ -76,6 +157,43 @@ class AvgProbClassifier(ClassifierI):
 			avg_probs[label] = float(sum(probs)) / len(probs)
 		
 		return DictionaryProbDist(avg_probs)
+	
+	def classify_many(self, featuresets):
+		featuresets = list(featuresets)
+		label_freqs = [collections.Counter() for feat in featuresets]
+		
+		for classifier in self._classifiers:
+			for freqs, label in zip(label_freqs, classifier.classify_many(featuresets)):
+				freqs[label] += 1
+		
+		return [freqs.most_common(1)[0][0] for freqs in label_freqs]
+	
+	def batch_avg_probs(self, featuresets):
+		'''
+		Return an array of averaged label probabilities, with a row for each
+		featureset and a column for each label, and a boolean array of which
+		labels were given a probability by any classifier.
+		'''
+		featuresets = list(featuresets)
+		shape = (len(featuresets), len(self._labels))
+		sums = numpy.zeros(shape)
+		counts = numpy.zeros(shape)
+		
+		for classifier in self._classifiers:
+			probs, given = batch_label_probs(classifier, featuresets, self._labels)
+			sums += probs
+			counts += given
+		
+		given = counts > 0
+		
+		with numpy.errstate(divide='ignore', invalid='ignore'):
+			return numpy.where(given, sums / counts, 0.0), given
+	
+	def prob_classify_many(self, featuresets):
+		avg_probs, given = self.batch_avg_probs(featuresets)
+		labels = self._labels
+		return [DictionaryProbDist(dict([(labels[j], p) for j, p in enumerate(row) if g[j]]))
+			for row, g in zip(avg_probs.tolist(), given.tolist())]
 
 class MultiBinaryClassifier(MultiClassifierI):
 	def __init__(self, label_classifiers):
@@ -94,35 +212,73 @@ class MultiBinaryClassifier(MultiClassifierI):
 		
 		return lbls
 	
+	def classify_many(self, featuresets):
+		featuresets = list(featuresets)
+		lbls = [set() for feat in featuresets]
+		
+		for label, classifier in iteritems(self._label_classifiers):
+			for i, result in enumerate(classifier.classify_many(featuresets)):
+				if result is True:
+					lbls[i].add(label)
+		
+		return lbls
+	
 	@classmethod
-	def train(cls, labels, multi_label_feats, trainf, **train_kwargs):
+	def train(cls, labels, multi_label_feats, trainf, jobs=1, **train_kwargs):
+		'''
+		Train a binary classifier for each label with trainf. If jobs is
+		greater than 1, the label classifiers are trained in parallel by a pool
+		of forked worker processes that share multi_label_feats.
+		'''
 		labelset = set(labels)
-		label_feats = collections.defaultdict(list)
-		pos_label_feats = collections.defaultdict(set)
+		multi_label_feats = list(multi_label_feats)
+		# dicts are unhashable, so fingerprint each feat once as a frozenset of key-values
+		fingerprints = [frozenset(iteritems(feat)) for feat, multi_labels in multi_label_feats]
+		pos_fingerprints = collections.defaultdict(set)
 		
-		for feat, multi_labels in multi_label_feats:
+		for fingerprint, (feat, multi_labels) in zip(fingerprints, multi_label_feats):
 			for label in multi_labels:
-				label_feats[label].append((feat, True))
-				# dicts are unhashable, so use a normalized tuple of key-values
-				pos_label_feats[label].add(tuple(sorted(feat.items())))
-			
-			for label in labelset - set(multi_labels):
-				label_feats[label].append((feat, False))
-		
-		for label in label_feats.keys():
-			feats = []
-			# this re-creates the feats list by ignoring any negative feat dicts
-			# that are also in pos_label_feats[label] so we don't create
-			# training conflicts
-			for feat, l in label_feats[label]:
-				if l or tuple(sorted(feat.items())) not in pos_label_feats[label]:
-					feats.append((feat, l))
-			
-			label_feats[label] = feats
+				pos_fingerprints[label].add(fingerprint)
+		
+		if multi_label_feats:
+			train_labels = sorted(labelset | set(pos_fingerprints.keys()))
+		else:
+			train_labels = []
 		
-		label_classifiers = {}
+		args = (multi_label_feats, fingerprints, pos_fingerprints, labelset, trainf, train_kwargs)
 		
-		for label, feats in iteritems(label_feats):
-			label_classifiers[label] = trainf(feats, **train_kwargs)
+		if jobs > 1 and len(train_labels) > 1:
+			pool = process_pool(min(jobs, len(train_labels)), _init_label_worker, args)
+			
+			try:
+				label_classifiers = dict(pool.map(_worker_train_label, train_labels, chunksize=1))
+			finally:
+				pool.terminate()
+		else:
+			label_classifiers = dict([_train_label(label, *args) for label in train_labels])
 		
-		return cls(label_classifiers)
\ No newline at end of file
+		return cls(label_classifiers)
+
+def _train_label(label, multi_label_feats, fingerprints, pos_fingerprints, labelset, trainf, train_kwargs):
+	feats = []
+	pos = pos_fingerprints[label]
+	
+	for fingerprint, (feat, multi_labels) in zip(fingerprints, multi_label_feats):
+		if label in multi_labels:
+			feats.append((feat, True))
+		# ignore any negative feat dicts that are also positive for label so
+		# we don't create training conflicts
+		elif label in labelset and fingerprint not in pos:
+			feats.append((feat, False))
+	
+	return label, trainf(feats, **train_kwargs)
+
+# set in each worker process by _init_label_worker
+_label_args = None
+
+def _init_label_worker(*args):
+	global _label_args
+	_label_args = args
+
+def _worker_train_label(label):
+	return _train_label(label, *_label_args)
@@ -0,0 +1,166 @@
+import collections
+import numpy, scipy.sparse
+from nltk.classify import ClassifierI, NaiveBayesClassifier
+from nltk.probability import DictionaryProbDist
+from nltk_trainer import iteritems
+from nltk_trainer.classification import multi
+
+class CompiledNaiveBayesClassifier(ClassifierI):
+	'''
+	A NaiveBayesClassifier compiled into NumPy tables of log2 probabilities.
+	Each known (fname, fval) pair gets a row of per-label log probabilities,
+	and each known fname gets another row for values that were never seen
+	in training. A batch of featuresets is then scored with a single sparse
+	matrix product, and gives the same results as the original classifier.
+	
+	>>> train = [({'a': True}, 'x'), ({'a': True, 'b': True}, 'x'), ({'b': True}, 'y')]
+	>>> nb = NaiveBayesClassifier.train(train + [({'b': True, 'c': True}, 'y')])
+	>>> cnb = CompiledNaiveBayesClassifier.compile(nb)
+	>>> cnb.classify_many([{'a': True}, {'b': True}, {'a': False}, {'d': True}])
+	['x', 'y', 'y', 'y']
+	>>> '%.6f' % cnb.prob_classify({'b': True}).prob('y')
+	'0.625000'
+	'''
+	def __init__(self, labels, label_logprobs, feature_index, unseen_index, weights):
+		self._labels = labels
+		self._label_logprobs = label_logprobs
+		# maps (fname, fval) to a row of weights
+		self._feature_index = feature_index
+		# maps fname to the row of weights for unseen values
+		self._unseen_index = unseen_index
+		self._weights = weights
+	
+	def labels(self):
+		return self._labels
+	
+	def _feature_matrix(self, featuresets):
+		index = self._feature_index
+		unseen_index = self._unseen_index
+		indptr = [0]
+		indices = []
+		
+		for featureset in featuresets:
+			for fname, fval in iteritems(featureset):
+				try:
+					row = index.get((fname, fval))
+				except TypeError: # unhashable fval
+					row = None
+				
+				if row is None:
+					# unseen values use the fname row, unseen fnames are ignored
+					row = unseen_index.get(fname)
+				
+				if row is not None:
+					indices.append(row)
+			
+			indptr.append(len(indices))
+		
+		data = numpy.ones(len(indices), dtype=numpy.float64)
+		shape = (len(featuresets), self._weights.shape[0])
+		return scipy.sparse.csr_matrix((data, indices, indptr), shape=shape)
+	
+	def batch_logprobs(self, featuresets):
+		'''
+		Return an array of unnormalized label log2 probabilities, with a row
+		for each featureset and a column for each label.
+		'''
+		featuresets = list(featuresets)
+		X = self._feature_matrix(featuresets)
+		return numpy.asarray(X.dot(self._weights)) + self._label_logprobs
+	
+	def batch_probs(self, featuresets):
+		'''
+		Return an array of normalized label probabilities, with a row for each
+		featureset and a column for each label.
+		'''
+		logprobs = self.batch_logprobs(featuresets)
+		
+		with numpy.errstate(invalid='ignore'):
+			logprobs -= numpy.logaddexp2.reduce(logprobs, axis=1)[:, numpy.newaxis]
+		
+		probs = numpy.exp2(logprobs)
+		# rows where every label is impossible are uniform, like DictionaryProbDist
+		probs[numpy.isnan(probs).any(axis=1)] = 1.0 / len(self._labels)
+		return probs
+	
+	def classify(self, featureset):
+		return self.classify_many([featureset])[0]
+	
+	def prob_classify(self, featureset):
+		return self.prob_classify_many([featureset])[0]
+	
+	def classify_many(self, featuresets):
+		logprobs = self.batch_logprobs(featuresets)
+		best = logprobs.argmax(axis=1)
+		labels = [self._labels[i] for i in best.tolist()]
+		# DictionaryProbDist.max() breaks ties by the greatest label
+		ismax = logprobs == logprobs[numpy.arange(len(best)), best][:, numpy.newaxis]
+		
+		for i in numpy.flatnonzero(ismax.sum(axis=1) > 1).tolist():
+			labels[i] = max([self._labels[j] for j in numpy.flatnonzero(ismax[i]).tolist()])
+		
+		return labels
+	
+	def prob_classify_many(self, featuresets):
+		logprobs = self.batch_logprobs(featuresets)
+		return [DictionaryProbDist(dict(zip(self._labels, row)), normalize=True, log=True)
+			for row in logprobs.tolist()]
+	
+	@classmethod
+	def compile(cls, classifier):
+		'''Return a CompiledNaiveBayesClassifier for a trained NaiveBayesClassifier'''
+		labels = list(classifier.labels())
+		label_logprobs = numpy.array([classifier._label_probdist.logprob(l) for l in labels])
+		fname_probdists = collections.defaultdict(dict)
+		
+		for (label, fname), probdist in iteritems(classifier._feature_probdist):
+			fname_probdists[fname][label] = probdist
+		
+		unseen = object()
+		feature_index = {}
+		unseen_index = {}
+		rows = []
+		
+		def add_row(index, key, fval, probdists):
+			index[key] = len(rows)
+			# missing (label, fname) pairs get 0 probability, like in NaiveBayesClassifier
+			rows.append([probdists[l].logprob(fval) if l in probdists else float('-inf')
+				for l in labels])
+		
+		for fname, probdists in iteritems(fname_probdists):
+			fvals = set()
+			
+			for probdist in probdists.values():
+				fvals.update(probdist.samples())
+			
+			for fval in fvals:
+				add_row(feature_index, (fname, fval), fval, probdists)
+			
+			add_row(unseen_index, fname, unseen, probdists)
+		
+		weights = numpy.array(rows, dtype=numpy.float64).reshape((len(rows), len(labels)))
+		return cls(labels, label_logprobs, feature_index, unseen_index, weights)
+
+def compile_classifier(classifier):
+	'''
+	Return a copy of classifier with any NaiveBayesClassifier, including those
+	inside combined classifiers, replaced by a CompiledNaiveBayesClassifier.
+	Other classifiers are returned as is.
+	'''
+	if isinstance(classifier, NaiveBayesClassifier):
+		return CompiledNaiveBayesClassifier.compile(classifier)
+	elif isinstance(classifier, multi.AvgProbClassifier):
+		return multi.AvgProbClassifier([compile_classifier(c) for c in classifier._classifiers])
+	elif isinstance(classifier, multi.MultiBinaryClassifier):
+		return multi.MultiBinaryClassifier(dict([(label, compile_classifier(c))
+			for label, c in iteritems(classifier._label_classifiers)]))
+	elif isinstance(classifier, multi.HierarchicalClassifier):
+		return multi.HierarchicalClassifier(compile_classifier(classifier.root),
+			dict([(label, compile_classifier(c))
+				for label, c in iteritems(classifier.label_classifiers)]))
+	else:
+		return classifier
+
+if __name__ == '__main__':
+	import doctest
+	doctest.testmod()
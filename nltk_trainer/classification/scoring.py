@@ -1,32 +1,238 @@
-import collections, itertools, random
+import collections, heapq, itertools, random, sys
+import numpy, scipy.sparse
 from numpy import array
-from nltk.metrics import masi_distance, f_measure, precision, recall
-from nltk_trainer import iteritems
+from nltk.metrics import BigramAssocMeasures, masi_distance
+from nltk_trainer import iteritems, process_pool
+from nltk_trainer.classification.sketch import CountMinSketch, SpaceSaving
+from nltk_trainer.classification.vocab import Vocabulary
+
+try:
+	from StringIO import StringIO
+except ImportError:
+	from io import StringIO
 
 def sum_category_word_scores(categorized_words, score_fn):
-	word_fd = collections.Counter()
-	category_word_fd = collections.defaultdict(collections.Counter)
+	vocab = Vocabulary()
+	category_ids = collections.OrderedDict()
 	
 	for category, words in categorized_words:
-		for word in words:
-			word_fd[word] += 1
-			category_word_fd[category][word] += 1
+		category_ids.setdefault(category, []).append(vocab.encode(words))
+	
+	categories, counts = category_id_counts(iteritems(category_ids), len(vocab))
+	scores = category_count_scores(counts, score_fn)
+	return collections.defaultdict(int, zip(vocab.tokens, scores.tolist()))
+
+def category_id_counts(categorized_ids, size, batch_size=1000000):
+	'''
+	Count ids for each category of id arrays from a Vocabulary of the given
+	size. Returns a list of categories and a sparse category x id matrix of
+	counts, counting ids in batches so no more than batch_size ids are
+	copied at once. Only the unique ids of each batch are stored, so memory
+	doesn't grow with size, which can be large for hashed ids.
 	
-	scores = collections.defaultdict(int)
-	n_xx = sum(itertools.chain(*[fd.values() for fd in category_word_fd.values()]))
+	>>> from array import array
+	>>> categories, counts = category_id_counts([('a', [array('I', [3, 1, 3])]), ('b', [array('I', [1])])], 2 ** 30)
+	>>> categories, counts.shape, counts[:, :4].toarray().tolist()
+	(['a', 'b'], (2, 1073741824), [[0, 1, 0, 2], [0, 1, 0, 0]])
+	'''
+	categories = []
+	rows = []
 	
-	for category in category_word_fd.keys():
-		n_xi = sum(category_word_fd[category].values())
+	def count_batch(batch):
+		ids, counts = numpy.unique(numpy.concatenate(batch), return_counts=True)
+		return scipy.sparse.csr_matrix((counts.astype(numpy.int64), ids, [0, len(ids)]), shape=(1, size))
+	
+	for category, id_arrays in categorized_ids:
+		counts = scipy.sparse.csr_matrix((1, size), dtype=numpy.int64)
+		batch = []
+		nbatch = 0
 		
-		for word, n_ii in iteritems(category_word_fd[category]):
-			n_ix = word_fd[word]
-			scores[word] += score_fn(n_ii, (n_ix, n_xi), n_xx)
+		for ids in id_arrays:
+			if not len(ids):
+				continue
+			
+			batch.append(numpy.frombuffer(ids, dtype=numpy.uint32))
+			nbatch += len(ids)
+			
+			if nbatch >= batch_size:
+				counts = counts + count_batch(batch)
+				batch = []
+				nbatch = 0
+		
+		if nbatch:
+			counts = counts + count_batch(batch)
+		
+		categories.append(category)
+		rows.append(counts)
+	
+	return categories, scipy.sparse.vstack(rows, format='csr')
+
+def sum_category_id_scores(categorized_ids, score_fn, size):
+	'''
+	Like sum_category_word_scores, but for categories of id arrays from a
+	Vocabulary of the given size. Returns a dict of id scores.
+	'''
+	categories, counts = category_id_counts(categorized_ids, size)
+	# only score the ids that were counted, with a column for each
+	ids = numpy.unique(counts.indices)
+	cols = numpy.searchsorted(ids, counts.indices)
+	counts = scipy.sparse.csr_matrix((counts.data, cols, counts.indptr), shape=(counts.shape[0], len(ids)))
+	scores = category_count_scores(counts, score_fn)
+	return collections.defaultdict(int, zip(ids.tolist(), scores.tolist()))
+
+def category_count_scores(counts, score_fn):
+	'''
+	Return an array of word scores summed over categories, given a sparse
+	category x word matrix of counts. Known BigramAssocMeasures functions are
+	computed for every (category, word) pair in one vectorized pass, anything
+	else is called once per pair.
+	'''
+	counts = counts.tocoo()
+	n_ix = numpy.asarray(counts.sum(axis=0), dtype=numpy.float64).ravel()[counts.col]
+	n_xi = numpy.asarray(counts.sum(axis=1), dtype=numpy.float64).ravel()[counts.row]
+	n_xx = int(counts.sum())
+	pair_scores = score_pairs(score_fn, counts.data, n_ix, n_xi, n_xx)
+	return numpy.bincount(counts.col, weights=pair_scores, minlength=counts.shape[1])
+
+def score_pairs(score_fn, n_ii, n_ix, n_xi, n_xx):
+	'''
+	Return an array of score_fn(n_ii, (n_ix, n_xi), n_xx) for arrays of
+	(category, word) counts and marginals.
+	'''
+	n_ii = numpy.asarray(n_ii, dtype=numpy.float64)
+	n_ix = numpy.asarray(n_ix, dtype=numpy.float64)
+	n_xi = numpy.asarray(n_xi, dtype=numpy.float64)
+	vfn = vectorized_score_fn(score_fn)
 	
-	return scores
+	if vfn:
+		with numpy.errstate(divide='ignore', invalid='ignore'):
+			return vfn(n_ii, n_ix, n_xi, float(n_xx))
+	
+	marginals = zip(n_ii.astype(numpy.int64).tolist(), n_ix.astype(numpy.int64).tolist(),
+		n_xi.astype(numpy.int64).tolist())
+	return numpy.array([score_fn(ii, (ix, xi), n_xx) for ii, ix, xi in marginals],
+		dtype=numpy.float64)
+
+def sketch_word_scores(categorized_words, score_fn, capacity, width=2**20, depth=4,
+		chunk_size=100000):
+	'''
+	Streaming version of sum_category_word_scores that uses a fixed amount of
+	memory no matter how large the vocabulary is. Each category keeps a
+	SpaceSaving sketch of its top capacity words, and total word counts are
+	estimated with a CountMinSketch of depth x width counters. Words are read
+	chunk_size at a time, so categorized_words can be a lazy iteration of
+	(category, words) pairs. Only words that are heavy hitters in some
+	category are scored, and their counts are approximate, so scores for
+	words near the cutoff may differ from the exact scores.
+	'''
+	cms = CountMinSketch(width=width, depth=depth)
+	sketches = collections.OrderedDict()
+	totals = collections.defaultdict(int)
+	
+	for category, words in categorized_words:
+		if category not in sketches:
+			sketches[category] = SpaceSaving(capacity)
+		
+		words = iter(words)
+		
+		while True:
+			chunk = collections.Counter(itertools.islice(words, chunk_size))
+			
+			if not chunk:
+				break
+			
+			sketches[category].update(chunk)
+			cms.update(chunk)
+			totals[category] += sum(chunk.values())
+	
+	vocab = Vocabulary()
+	cols = []
+	rows = []
+	n_ii = []
+	
+	for row, (category, sketch) in enumerate(iteritems(sketches)):
+		for word, n in sketch.items():
+			cols.append(vocab.intern(word))
+			rows.append(row)
+			n_ii.append(n)
+	
+	if not cols:
+		return collections.defaultdict(int)
+	
+	cols = numpy.array(cols, dtype=numpy.int64)
+	n_ix = cms.estimates(vocab.tokens)[cols]
+	# space saving overestimates, but a word can't occur in a category more
+	# than it occurs overall
+	n_ii = numpy.minimum(numpy.array(n_ii, dtype=numpy.int64), n_ix)
+	n_xi = numpy.array([totals[c] for c in sketches], dtype=numpy.int64)[rows]
+	pair_scores = score_pairs(score_fn, n_ii, n_ix, n_xi, sum(totals.values()))
+	scores = numpy.bincount(cols, weights=pair_scores, minlength=len(vocab))
+	return collections.defaultdict(int, zip(vocab.tokens, scores.tolist()))
+
+#####################################
+## vectorized association measures ##
+#####################################
+
+# same as nltk.metrics.association._SMALL
+_SMALL = 1e-20
+
+def _contingency(n_ii, n_ix, n_xi, n_xx):
+	n_oi = n_xi - n_ii
+	n_io = n_ix - n_ii
+	return n_ii, n_oi, n_io, n_xx - n_ii - n_oi - n_io
+
+def _phi_sq(n_ii, n_ix, n_xi, n_xx):
+	n_ii, n_oi, n_io, n_oo = _contingency(n_ii, n_ix, n_xi, n_xx)
+	return (n_ii * n_oo - n_io * n_oi) ** 2 / ((n_ii + n_io) * (n_ii + n_oi) * (n_io + n_oo) * (n_oi + n_oo))
+
+def _likelihood_ratio(n_ii, n_ix, n_xi, n_xx):
+	cont = _contingency(n_ii, n_ix, n_xi, n_xx)
+	total = 0
+	
+	for i in range(4):
+		exp = (cont[i] + cont[i ^ 1]) * (cont[i] + cont[i ^ 2]) / n_xx
+		total = total + cont[i] * numpy.log(cont[i] / (exp + _SMALL) + _SMALL)
+	
+	return 2 * total
+
+def _poisson_stirling(n_ii, n_ix, n_xi, n_xx):
+	exp = n_ix * n_xi / n_xx
+	return n_ii * (numpy.log2(n_ii / exp) - 1)
+
+def _jaccard(n_ii, n_ix, n_xi, n_xx):
+	n_ii, n_oi, n_io, n_oo = _contingency(n_ii, n_ix, n_xi, n_xx)
+	return n_ii / (n_ii + n_oi + n_io)
+
+# array versions of BigramAssocMeasures, called as fn(n_ii, n_ix, n_xi, n_xx)
+vectorized_score_fns = {
+	'chi_sq': lambda n_ii, n_ix, n_xi, n_xx: n_xx * _phi_sq(n_ii, n_ix, n_xi, n_xx),
+	'dice': lambda n_ii, n_ix, n_xi, n_xx: 2 * n_ii / (n_ix + n_xi),
+	'jaccard': _jaccard,
+	'likelihood_ratio': _likelihood_ratio,
+	'mi_like': lambda n_ii, n_ix, n_xi, n_xx: n_ii ** 3 / (n_ix * n_xi),
+	'phi_sq': _phi_sq,
+	'pmi': lambda n_ii, n_ix, n_xi, n_xx: numpy.log2(n_ii * n_xx) - numpy.log2(n_ix * n_xi),
+	'poisson_stirling': _poisson_stirling,
+	'raw_freq': lambda n_ii, n_ix, n_xi, n_xx: n_ii / n_xx,
+	'student_t': lambda n_ii, n_ix, n_xi, n_xx: (n_ii - n_ix * n_xi / n_xx) / (n_ii + _SMALL) ** 0.5
+}
+
+def vectorized_score_fn(score_fn):
+	'''Return the array version of a BigramAssocMeasures score_fn, or None'''
+	name = getattr(score_fn, '__name__', None)
+	
+	if name in vectorized_score_fns and getattr(BigramAssocMeasures, name, None) == score_fn:
+		return vectorized_score_fns[name]
+	else:
+		return None
 
 def sorted_word_scores(wsdict):
 	return sorted(wsdict.items(), key=lambda ws: ws[1], reverse=True)
 
+def top_word_scores(wsdict, n):
+	'''Like sorted_word_scores()[:n], but only keeps the top n in a heap'''
+	return heapq.nlargest(n, iteritems(wsdict), key=lambda ws: ws[1])
+
 def ref_test_sets(classifier, test_feats):
 	refsets = collections.defaultdict(set)
 	testsets = collections.defaultdict(set)
@@ -62,7 +268,379 @@ def avg_masi_distance(multi_classifier, multi_label_feats):
 	else:
 		return 0.0
 
-def cross_fold(instances, trainf, testf, folds=10, trace=1, metrics=True, informative=0):
+################
+## evaluation ##
+################
+
+class LabelIndex(object):
+	'''Maps labels to row & column numbers, adding new labels as they're seen'''
+	def __init__(self, labels=()):
+		self.labels = []
+		self._index = {}
+		self.ids(labels)
+	
+	def __len__(self):
+		return len(self.labels)
+	
+	def get(self, label):
+		return self._index.get(label)
+	
+	def ids(self, labels):
+		'''Return an array of the ids of labels'''
+		index = self._index
+		ids = []
+		
+		for label in labels:
+			i = index.get(label)
+			
+			if i is None:
+				i = index[label] = len(self.labels)
+				self.labels.append(label)
+			
+			ids.append(i)
+		
+		return numpy.array(ids, dtype=numpy.intp)
+
+def _precision(tp, ntest):
+	return float(tp) / ntest if ntest else 0.0
+
+def _recall(tp, nref):
+	return float(tp) / nref if nref else 0.0
+
+def _f_measure(p, r):
+	# same formula as nltk.metrics.f_measure with alpha=0.5
+	return 1.0 / (0.5 / p + 0.5 / r) if p and r else 0.0
+
+class Evaluation(object):
+	'''
+	A confusion matrix of reference by observed label counts, which is
+	updated with each batch of classify_many() results. Accuracy and
+	per-label precision, recall & f-measure are all computed from the
+	matrix, and undefined metrics are 0.
+	
+	>>> e = Evaluation(['a', 'b'])
+	>>> e.add(['a', 'a', 'b', 'b'], ['a', 'b', 'b', 'c'])
+	>>> e.accuracy(), e.precision('b'), e.recall('b'), e.precision('c')
+	(0.5, 0.5, 0.5, 0.0)
+	>>> e.matrix.tolist()
+	[[1, 1, 0], [0, 1, 1], [0, 0, 0]]
+	'''
+	def __init__(self, labels=()):
+		self.index = LabelIndex(labels)
+		self.matrix = numpy.zeros((len(self.index), len(self.index)), dtype=numpy.int64)
+	
+	@property
+	def labels(self):
+		return self.index.labels
+	
+	def add(self, refs, tests):
+		'''Count a sequence of reference labels against observed labels'''
+		ref_ids = self.index.ids(refs)
+		test_ids = self.index.ids(tests)
+		grow = len(self.index) - self.matrix.shape[0]
+		
+		if grow:
+			self.matrix = numpy.pad(self.matrix, ((0, grow), (0, grow)), 'constant')
+		
+		numpy.add.at(self.matrix, (ref_ids, test_ids), 1)
+	
+	def update(self, classifier, labeled_featuresets):
+		'''Classify a batch of labeled featuresets and count the results'''
+		labeled_featuresets = list(labeled_featuresets)
+		
+		if labeled_featuresets:
+			featuresets, refs = zip(*labeled_featuresets)
+			self.add(refs, classifier.classify_many(featuresets))
+	
+	def __len__(self):
+		return int(self.matrix.sum())
+	
+	def accuracy(self):
+		n = len(self)
+		return float(numpy.trace(self.matrix)) / n if n else 0.0
+	
+	def _counts(self, label):
+		i = self.index.get(label)
+		
+		if i is None:
+			return 0, 0, 0
+		
+		return int(self.matrix[i, i]), int(self.matrix[i, :].sum()), int(self.matrix[:, i].sum())
+	
+	def precision(self, label):
+		tp, nref, ntest = self._counts(label)
+		return _precision(tp, ntest)
+	
+	def recall(self, label):
+		tp, nref, ntest = self._counts(label)
+		return _recall(tp, nref)
+	
+	def f_measure(self, label):
+		return _f_measure(self.precision(label), self.recall(label))
+	
+	def label_metrics(self):
+		'''Return an OrderedDict of label to precision, recall and f-measure'''
+		return collections.OrderedDict([(label, (self.precision(label),
+			self.recall(label), self.f_measure(label))) for label in self.labels])
+
+class MultiLabelEvaluation(object):
+	'''
+	Like Evaluation, but for multi-label classifiers that return a set of
+	labels. Each batch is turned into reference and observed label indicator
+	matrices, which are summed into per-label counts of true positives,
+	references and observations, along with the number of exact matches and
+	the total masi distance.
+	
+	>>> e = MultiLabelEvaluation(['a', 'b'])
+	>>> e.add([set(['a']), set(['a', 'b'])], [set(['a']), set(['b'])])
+	>>> e.accuracy(), e.recall('a'), e.precision('b')
+	(0.5, 0.5, 1.0)
+	>>> '%.4f' % e.avg_masi_distance()
+	'0.3333'
+	'''
+	def __init__(self, labels=()):
+		self.index = LabelIndex(labels)
+		n = len(self.index)
+		self.true_positives = numpy.zeros(n, dtype=numpy.int64)
+		self.references = numpy.zeros(n, dtype=numpy.int64)
+		self.observations = numpy.zeros(n, dtype=numpy.int64)
+		self.exact = 0
+		self.masi_total = 0.0
+		self.n = 0
+	
+	@property
+	def labels(self):
+		return self.index.labels
+	
+	def _indicators(self, labelsets):
+		ids = [self.index.ids(labelset) for labelset in labelsets]
+		rows = numpy.repeat(numpy.arange(len(ids)), [len(i) for i in ids])
+		cols = numpy.concatenate(ids) if ids else numpy.zeros(0, dtype=numpy.intp)
+		return rows, cols
+	
+	def add(self, refs, tests):
+		'''Count a sequence of reference label sets against observed label sets'''
+		ref_rows, ref_cols = self._indicators(refs)
+		test_rows, test_cols = self._indicators(tests)
+		n = len(self.index)
+		grow = n - len(self.true_positives)
+		
+		if grow:
+			self.true_positives = numpy.pad(self.true_positives, (0, grow), 'constant')
+			self.references = numpy.pad(self.references, (0, grow), 'constant')
+			self.observations = numpy.pad(self.observations, (0, grow), 'constant')
+		
+		R = numpy.zeros((len(refs), n), dtype=bool)
+		T = numpy.zeros((len(refs), n), dtype=bool)
+		R[ref_rows, ref_cols] = True
+		T[test_rows, test_cols] = True
+		self.true_positives += (R & T).sum(axis=0)
+		self.references += R.sum(axis=0)
+		self.observations += T.sum(axis=0)
+		self.exact += int((R == T).all(axis=1).sum())
+		self.masi_total += float(masi_distances(R, T).sum())
+		self.n += len(refs)
+	
+	def update(self, classifier, multi_label_feats):
+		'''Classify a batch of multi-labeled featuresets and count the results'''
+		multi_label_feats = list(multi_label_feats)
+		
+		if multi_label_feats:
+			featuresets, refs = zip(*multi_label_feats)
+			self.add(refs, classifier.classify_many(featuresets))
+	
+	def __len__(self):
+		return self.n
+	
+	def accuracy(self):
+		'''The fraction of label sets that were exactly right'''
+		return float(self.exact) / self.n if self.n else 0.0
+	
+	def _counts(self, label):
+		i = self.index.get(label)
+		
+		if i is None:
+			return 0, 0, 0
+		
+		return int(self.true_positives[i]), int(self.references[i]), int(self.observations[i])
+	
+	def precision(self, label):
+		tp, nref, ntest = self._counts(label)
+		return _precision(tp, ntest)
+	
+	def recall(self, label):
+		tp, nref, ntest = self._counts(label)
+		return _recall(tp, nref)
+	
+	def f_measure(self, label):
+		return _f_measure(self.precision(label), self.recall(label))
+	
+	def avg_masi_distance(self):
+		return self.masi_total / self.n if self.n else 0.0
+
+def masi_distances(R, T):
+	'''
+	Return the nltk.metrics.masi_distance between each row of the reference
+	and observed label indicator matrices R & T. Two empty label sets have a
+	distance of 0.
+	'''
+	intersection = (R & T).sum(axis=1)
+	union = (R | T).sum(axis=1)
+	nref = R.sum(axis=1)
+	ntest = T.sum(axis=1)
+	m = numpy.where((nref == ntest) & (nref == intersection), 1.0,
+		numpy.where(intersection == numpy.minimum(nref, ntest), 2.0 / 3,
+		numpy.where(intersection > 0, 1.0 / 3, 0.0)))
+	
+	with numpy.errstate(invalid='ignore', divide='ignore'):
+		distances = 1 - intersection / union.astype(numpy.float64) * m
+	
+	return numpy.where(union > 0, distances, 0.0)
+
+def evaluate(classifier, labeled_featuresets, labels=()):
+	'''Classify every featureset with one classify_many() call and return an Evaluation'''
+	evaluation = Evaluation(labels)
+	evaluation.update(classifier, labeled_featuresets)
+	return evaluation
+
+def evaluate_multi(multi_classifier, multi_label_feats, labels=()):
+	'''Like evaluate, but for a multi-label classifier, returning a MultiLabelEvaluation'''
+	evaluation = MultiLabelEvaluation(labels)
+	evaluation.update(multi_classifier, multi_label_feats)
+	return evaluation
+
+class FoldView(object):
+	'''
+	A read only sequence of the instances outside of instances[start:end], or
+	inside it if inside is True, that indexes into instances instead of
+	copying them.
+	
+	>>> view = FoldView(['a', 'b', 'c', 'd', 'e'], 1, 3)
+	>>> len(view), list(view), view[1], view[-1]
+	(3, ['a', 'd', 'e'], 'd', 'e')
+	>>> list(FoldView(['a', 'b', 'c', 'd', 'e'], 1, 3, inside=True))
+	['b', 'c']
+	'''
+	def __init__(self, instances, start, end, inside=False):
+		self.instances = instances
+		self.start = start
+		self.end = end
+		self.inside = inside
+	
+	def __len__(self):
+		if self.inside:
+			return self.end - self.start
+		else:
+			return len(self.instances) - (self.end - self.start)
+	
+	def __getitem__(self, i):
+		if isinstance(i, slice):
+			return [self[j] for j in range(*i.indices(len(self)))]
+		
+		n = len(self)
+		
+		if i < 0:
+			i += n
+		
+		if i < 0 or i >= n:
+			raise IndexError('fold index out of range')
+		
+		if self.inside:
+			return self.instances[self.start + i]
+		elif i < self.start:
+			return self.instances[i]
+		else:
+			return self.instances[i + self.end - self.start]
+	
+	def __iter__(self):
+		if self.inside:
+			ranges = [range(self.start, self.end)]
+		else:
+			ranges = [range(0, self.start), range(self.end, len(self.instances))]
+		
+		for r in ranges:
+			for i in r:
+				yield self.instances[i]
+
+def train_test_fold(instances, trainf, testf, f, step, trace=1, metrics=True, informative=0):
+	'''
+	Train on every instance outside of fold f and test on the step instances
+	inside it. Returns the accuracy and a dict of label to precision, recall
+	and f-measure, which is empty unless metrics is True. The test instances
+	are only classified once: by testf(classifier, test_instances) if given
+	and metrics is False, or else into an Evaluation, which gives the
+	accuracy and the metrics.
+	'''
+	l = len(instances)
+	
+	if trace:
+		print('\nfold %d' % (f+1))
+		print('-----%s' % ('-'*len('%s' % (f+1))))
+	
+	start = f * step
+	end = start + step
+	train_instances = FoldView(instances, start, end)
+	test_instances = FoldView(instances, start, end, inside=True)
+	
+	if trace:
+		print('training on %d:%d + %d:%d' % (0, start, end, l))
+	
+	obj = trainf(train_instances)
+	
+	if trace:
+		print('testing on %d:%d' % (start, end))
+	
+	label_metrics = collections.OrderedDict()
+	
+	if testf and not metrics:
+		accuracy = testf(obj, test_instances)
+	else:
+		evaluation = evaluate(obj, test_instances)
+		accuracy = evaluation.accuracy()
+		
+		if metrics:
+			label_metrics = evaluation.label_metrics()
+	
+	if trace:
+		for key, (p, r, fm) in iteritems(label_metrics):
+			print('%s precision: %f' % (key, p))
+			print('%s recall: %f' % (key, r))
+			print('%s f-measure: %f' % (key, fm))
+	
+	if trace:
+		print('accuracy: %f' % accuracy)
+	
+	if trace and informative and hasattr(obj, 'show_most_informative_features'):
+		obj.show_most_informative_features(informative)
+	
+	return accuracy, label_metrics
+
+# set in each worker process by _init_fold_worker
+_fold_args = None
+
+def _init_fold_worker(*args):
+	global _fold_args
+	_fold_args = args
+
+def _worker_train_test_fold(f):
+	instances, trainf, testf, step, trace, metrics, informative = _fold_args
+	# capture trace output so folds can be printed in order by the parent
+	stdout = sys.stdout
+	sys.stdout = StringIO()
+	
+	try:
+		accuracy, label_metrics = train_test_fold(instances, trainf, testf, f, step,
+			trace=trace, metrics=metrics, informative=informative)
+		return accuracy, label_metrics, sys.stdout.getvalue()
+	finally:
+		sys.stdout = stdout
+
+def cross_fold(instances, trainf, testf=None, folds=10, trace=1, metrics=True, informative=0, jobs=1):
+	'''
+	Cross validate trainf over folds of instances. If jobs is greater than 1,
+	folds are trained and tested in parallel by a pool of forked worker
+	processes that share instances, instead of each getting a copy.
+	'''
 	if folds < 2:
 		raise ValueError('must have at least 3 folds')
 	# ensure isn't an exhaustible iterable
@@ -81,51 +659,29 @@ def cross_fold(instances, trainf, testf, folds=10, trace=1, metrics=True, inform
 	recalls = collections.defaultdict(list)
 	f_measures = collections.defaultdict(list)
 	
-	for f in range(folds):
-		if trace:
-			print('\nfold %d' % (f+1))
-			print('-----%s' % ('-'*len('%s' % (f+1))))
-		
-		start = f * step
-		end = start + step
-		train_instances = instances[:start] + instances[end:]
-		test_instances = instances[start:end]
-		
-		if trace:
-			print('training on %d:%d + %d:%d' % (0, start, end, l))
-		
-		obj = trainf(train_instances)
+	if jobs > 1:
+		pool = process_pool(min(jobs, folds), _init_fold_worker,
+			(instances, trainf, testf, step, trace, metrics, informative))
 		
-		if trace:
-			print('testing on %d:%d' % (start, end))
-		
-		if metrics:
-			refsets, testsets = ref_test_sets(obj, test_instances)
+		try:
+			results = []
 			
-			for key in set(refsets.keys()) | set(testsets.keys()):
-				ref = refsets[key]
-				test = testsets[key]
-				p = precision(ref, test) or 0
-				r = recall(ref, test) or 0
-				f = f_measure(ref, test) or 0
-				precisions[key].append(p)
-				recalls[key].append(r)
-				f_measures[key].append(f)
-				
-				if trace:
-					print('%s precision: %f' % (key, p))
-					print('%s recall: %f' % (key, r))
-					print('%s f-measure: %f' % (key, f))
-		
-		accuracy = testf(obj, test_instances)
-		
-		if trace:
-			print('accuracy: %f' % accuracy)
-		
+			for accuracy, label_metrics, output in pool.imap(_worker_train_test_fold, range(folds)):
+				sys.stdout.write(output)
+				results.append((accuracy, label_metrics))
+		finally:
+			pool.terminate()
+	else:
+		results = (train_test_fold(instances, trainf, testf, f, step, trace=trace,
+			metrics=metrics, informative=informative) for f in range(folds))
+	
+	for accuracy, label_metrics in results:
 		accuracies.append(accuracy)
 		
-		if trace and informative and hasattr(obj, 'show_most_informative_features'):
-			obj.show_most_informative_features(informative)
+		for key, (p, r, fm) in iteritems(label_metrics):
+			precisions[key].append(p)
+			recalls[key].append(r)
+			f_measures[key].append(fm)
 	
 	if trace:
 		print('\nmean and variance across folds')
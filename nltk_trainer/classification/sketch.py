@@ -0,0 +1,104 @@
+import heapq
+import numpy
+
+class CountMinSketch(object):
+	'''
+	Approximate token counts in a fixed depth x width table of counters.
+	Estimates never undercount, and overcount by at most 2N/width with
+	probability 1 - 2**-depth, where N is the total count.
+	
+	>>> cms = CountMinSketch(width=1024, depth=4)
+	>>> cms.update({'a': 3, 'b': 1})
+	>>> cms.update({'a': 2})
+	>>> cms['a'], cms['b'], cms['c']
+	(5, 1, 0)
+	'''
+	def __init__(self, width=2**20, depth=4, seed=0):
+		self.width = width
+		self.depth = depth
+		self.table = numpy.zeros((depth, width), dtype=numpy.int64)
+		rng = numpy.random.RandomState(seed)
+		# odd multipliers for multiply-shift hashing of 64 bit token hashes
+		self._a = rng.randint(1, 2**62, size=depth, dtype=numpy.int64).astype(numpy.uint64) * 2 + 1
+		self._b = rng.randint(0, 2**62, size=depth, dtype=numpy.int64).astype(numpy.uint64)
+	
+	def _columns(self, tokens):
+		hashes = numpy.array([hash(t) & 0xFFFFFFFFFFFFFFFF for t in tokens], dtype=numpy.uint64)
+		# uint64 arithmetic wraps around, which is what multiply-shift wants
+		return [((hashes * a + b) >> numpy.uint64(32)) % numpy.uint64(self.width)
+			for a, b in zip(self._a, self._b)]
+	
+	def update(self, counts):
+		'''Add a dict of token counts'''
+		if not counts:
+			return
+		
+		tokens = list(counts.keys())
+		values = numpy.array([counts[t] for t in tokens], dtype=numpy.int64)
+		
+		for row, cols in enumerate(self._columns(tokens)):
+			numpy.add.at(self.table[row], cols, values)
+	
+	def estimates(self, tokens):
+		'''Return an array of estimated counts for a list of tokens'''
+		if not tokens:
+			return numpy.zeros(0, dtype=numpy.int64)
+		
+		rows = [self.table[row][cols] for row, cols in
+			enumerate(self._columns(tokens))]
+		return numpy.min(rows, axis=0)
+	
+	def __getitem__(self, token):
+		return int(self.estimates([token])[0])
+
+class SpaceSaving(object):
+	'''
+	Track the approximate top capacity heavy hitters of a stream of token
+	counts. Counts are merged in batches; when more than capacity tokens are
+	tracked, the smallest are evicted and the largest evicted count becomes
+	the floor that new tokens start from, so tracked counts never undercount
+	and overcount by at most the floor.
+	
+	>>> ss = SpaceSaving(2)
+	>>> ss.update({'a': 5, 'b': 3, 'c': 1})
+	>>> sorted(ss.items())
+	[('a', 5), ('b', 3)]
+	>>> ss.update({'c': 3})
+	>>> sorted(ss.items()), ss.floor
+	([('a', 5), ('c', 4)], 3)
+	'''
+	def __init__(self, capacity):
+		self.capacity = capacity
+		self.counts = {}
+		self.floor = 0
+	
+	def __len__(self):
+		return len(self.counts)
+	
+	def update(self, counts):
+		'''Merge a dict of token counts'''
+		tracked = self.counts
+		
+		for token, n in counts.items():
+			if token in tracked:
+				tracked[token] += n
+			else:
+				tracked[token] = self.floor + n
+		
+		if len(tracked) > self.capacity:
+			self.counts = dict(heapq.nlargest(self.capacity, tracked.items(), key=lambda tn: tn[1]))
+			evicted = max([n for t, n in tracked.items() if t not in self.counts])
+			self.floor = max(self.floor, evicted)
+	
+	def items(self):
+		return self.counts.items()
+	
+	def most_common(self, n=None):
+		if n is None:
+			return sorted(self.counts.items(), key=lambda tn: tn[1], reverse=True)
+		else:
+			return heapq.nlargest(n, self.counts.items(), key=lambda tn: tn[1])
+
+if __name__ == '__main__':
+	import doctest
+	doctest.testmod()
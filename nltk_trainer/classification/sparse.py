@@ -0,0 +1,289 @@
+import numbers
+from array import array
+import numpy, scipy.sparse
+from sklearn.base import clone
+from nltk.classify import ClassifierI
+from nltk.probability import DictionaryProbDist
+from nltk_trainer import iteritems
+
+class SparseSklearnClassifier(ClassifierI):
+	'''
+	Wraps a sklearn estimator like nltk's SklearnClassifier, but builds a CSR
+	matrix straight from the featuresets in one pass, or from arrays of
+	vocabulary ids with train_ids, with a feature index that is fixed after
+	training, instead of going through a DictVectorizer. Estimators that need
+	dense input are fit with dense row batches, so they must have
+	partial_fit, and every estimator predicts in row batches, so the whole
+	matrix is never densified at once.
+	
+	>>> from sklearn.naive_bayes import BernoulliNB
+	>>> train = [({'a': True}, 'x'), ({'a': True, 'b': True}, 'x'), ({'b': True}, 'y')]
+	>>> classifier = SparseSklearnClassifier.train(train, BernoulliNB())
+	>>> classifier.classify_many([{'a': True}, {'b': True, 'c': True}])
+	['x', 'y']
+	>>> classifier.batch_probs([{'a': True}]).shape
+	(1, 2)
+	'''
+	def __init__(self, estimator, labels, feature_index, dtype=float, dense=False, batch_size=1000):
+		self._estimator = estimator
+		self._labels = labels
+		# maps fname, or (fname, fval) for non numeric values, to a column
+		self._feature_index = feature_index
+		self._dtype = dtype
+		self._dense = dense
+		self._batch_size = batch_size
+	
+	def __repr__(self):
+		return '<SparseSklearnClassifier(%r)>' % self._estimator
+	
+	def labels(self):
+		return self._labels
+	
+	@staticmethod
+	def _build_matrix(featuresets, index, dtype, grow=False):
+		'''
+		Return a CSR matrix with a row for each featureset. Features not in
+		index are ignored, unless grow is True, in which case they are
+		added as new columns.
+		'''
+		indptr = [0]
+		indices = []
+		data = []
+		
+		for featureset in featuresets:
+			for fname, fval in iteritems(featureset):
+				if not isinstance(fval, numbers.Number):
+					# one column per value, like DictVectorizer
+					fname, fval = (fname, fval), 1
+				
+				if not fval:
+					continue
+				
+				j = index.get(fname)
+				
+				if j is None:
+					if not grow:
+						continue
+					
+					j = index[fname] = len(index)
+				
+				indices.append(j)
+				data.append(fval)
+			
+			indptr.append(len(indices))
+		
+		shape = (len(indptr) - 1, len(index))
+		return scipy.sparse.csr_matrix((numpy.array(data, dtype=dtype), indices, indptr), shape=shape)
+	
+	@staticmethod
+	def _build_id_matrix(id_arrays, columns, size, dtype, binary=True):
+		'''
+		Return a CSR matrix with a row for each array of ids, where each id
+		is counted in its column, or only marked if binary. columns is an
+		array mapping ids to columns, with -1 for ignored ids, or None if
+		the ids are the columns.
+		'''
+		ids = array('I')
+		lengths = []
+		
+		for id_array in id_arrays:
+			ids.extend(id_array)
+			lengths.append(len(id_array))
+		
+		cols = numpy.array(ids, dtype=numpy.intp)
+		rows = numpy.repeat(numpy.arange(len(lengths)), lengths)
+		
+		if columns is not None:
+			cols = columns[cols]
+			rows = rows[cols >= 0]
+			cols = cols[cols >= 0]
+		
+		data = numpy.ones(len(cols), dtype=numpy.int32)
+		# duplicate ids in a row are summed when converting to CSR
+		X = scipy.sparse.coo_matrix((data, (rows, cols)), shape=(len(lengths), size)).tocsr()
+		
+		if binary:
+			X.data[:] = 1
+		
+		return X.astype(dtype)
+	
+	def _batches(self, featuresets):
+		X = self._build_matrix(featuresets, self._feature_index, self._dtype)
+		
+		for start in range(0, X.shape[0], self._batch_size):
+			batch = X[start:start + self._batch_size]
+			yield batch.toarray() if self._dense else batch
+	
+	def classify(self, featureset):
+		return self.classify_many([featureset])[0]
+	
+	def prob_classify(self, featureset):
+		return self.prob_classify_many([featureset])[0]
+	
+	def classify_many(self, featuresets):
+		labels = self._labels
+		return [labels[i] for batch in self._batches(featuresets)
+			for i in self._estimator.predict(batch).tolist()]
+	
+	def batch_probs(self, featuresets):
+		'''
+		Return an array of label probabilities, with a row for each
+		featureset and a column for each label. Raises NotImplementedError
+		if the estimator can't predict probabilities.
+		'''
+		if not hasattr(self._estimator, 'predict_proba'):
+			raise NotImplementedError()
+		
+		probs = [self._estimator.predict_proba(batch) for batch in self._batches(featuresets)]
+		
+		if not probs:
+			return numpy.zeros((0, len(self._labels)))
+		
+		return numpy.vstack(probs)
+	
+	def prob_classify_many(self, featuresets):
+		return [DictionaryProbDist(dict(zip(self._labels, row)))
+			for row in self.batch_probs(featuresets).tolist()]
+	
+	@staticmethod
+	def _fit(estimator, X, y, nlabels, dense, batch_size):
+		if not dense:
+			estimator.fit(X, y)
+		elif hasattr(estimator, 'partial_fit'):
+			classes = numpy.arange(nlabels)
+			
+			for start in range(0, X.shape[0], batch_size):
+				end = start + batch_size
+				estimator.partial_fit(X[start:end].toarray(), y[start:end], classes=classes)
+		else:
+			# fitting in one go would densify the whole matrix
+			raise ValueError('%s needs dense input, but has no partial_fit to train in row batches'
+				% estimator.__class__.__name__)
+	
+	@classmethod
+	def train(cls, labeled_featuresets, estimator, dtype=float, dense=False, batch_size=1000):
+		'''
+		Fit a clone of estimator, so the same estimator can be given to
+		many train calls. If dense is True, the estimator is given dense
+		rows in batches of batch_size, which requires partial_fit.
+		'''
+		index = {}
+		targets = []
+		
+		def featuresets():
+			for featureset, label in labeled_featuresets:
+				targets.append(label)
+				yield featureset
+		
+		X = cls._build_matrix(featuresets(), index, dtype, grow=True)
+		labels = sorted(set(targets))
+		label_ids = dict([(label, i) for i, label in enumerate(labels)])
+		y = numpy.array([label_ids[label] for label in targets])
+		estimator = clone(estimator)
+		cls._fit(estimator, X, y, len(labels), dense, batch_size)
+		return cls(estimator, labels, index, dtype=dtype, dense=dense, batch_size=batch_size)
+	
+	@classmethod
+	def train_ids(cls, labeled_ids, estimator, vocab, idset=None, binary=True,
+			dtype=float, dense=False, batch_size=1000):
+		'''
+		Like train, but for (id array, label) pairs of a Vocabulary, so the
+		matrix is built straight from the ids, without featuresets. There
+		is a column for every id in idset, or for every vocab id if idset is
+		None, that occurs in the training instances. Each column is fixed to
+		the vocab token of its id, so the classifier takes featuresets from
+		bag_of_words or word_counts. If binary is False, columns are token
+		counts.
+		
+		>>> from sklearn.naive_bayes import BernoulliNB
+		>>> from nltk_trainer.classification.vocab import Vocabulary
+		>>> vocab = Vocabulary(['a', 'b', 'c'])
+		>>> train = [(vocab.encode(['a']), 'x'), (vocab.encode(['a', 'b']), 'x'), (vocab.encode(['b', 'c']), 'y')]
+		>>> classifier = SparseSklearnClassifier.train_ids(train, BernoulliNB(), vocab, idset=set([0, 1]))
+		>>> classifier.classify_many([{'a': True}, {'b': True, 'c': True}])
+		['x', 'y']
+		'''
+		targets = []
+		
+		def id_arrays():
+			for ids, label in labeled_ids:
+				targets.append(label)
+				yield ids
+		
+		if idset is None:
+			columns = None
+			ids = numpy.arange(len(vocab))
+		else:
+			ids = numpy.array(sorted(idset), dtype=numpy.intp)
+			columns = numpy.empty(len(vocab), dtype=numpy.intp)
+			columns.fill(-1)
+			columns[ids] = numpy.arange(len(ids))
+		
+		X = cls._build_id_matrix(id_arrays(), columns, len(ids), dtype, binary=binary)
+		# like train, only features of the training instances get a column
+		used = numpy.unique(X.indices)
+		X = X[:, used]
+		tokens = vocab.tokens
+		index = dict([(tokens[i], j) for j, i in enumerate(ids[used].tolist())])
+		labels = sorted(set(targets))
+		label_ids = dict([(label, i) for i, label in enumerate(labels)])
+		y = numpy.array([label_ids[label] for label in targets])
+		estimator = clone(estimator)
+		cls._fit(estimator, X, y, len(labels), dense, batch_size)
+		return cls(estimator, labels, index, dtype=dtype, dense=dense, batch_size=batch_size)
+
+class ColumnIndex(object):
+	'''
+	A fixed feature index for featuresets whose fnames are already column
+	numbers, like hashed features, so no dict of fnames is needed.
+	
+	>>> index = ColumnIndex(4)
+	>>> index.get(3), index.get(4), index.get('a'), len(index)
+	(3, None, None, 4)
+	'''
+	def __init__(self, size):
+		self.size = size
+	
+	def __len__(self):
+		return self.size
+	
+	def get(self, fname, default=None):
+		if isinstance(fname, numbers.Integral) and 0 <= fname < self.size:
+			return fname
+		else:
+			return default
+
+class PartialFitTrainer(object):
+	'''
+	Trains a sklearn estimator with partial_fit, one batch of labeled
+	featuresets at a time. Every label must be known up front, and the
+	feature index must be fixed, such as a ColumnIndex of hashed features.
+	
+	>>> from sklearn.naive_bayes import MultinomialNB
+	>>> trainer = PartialFitTrainer(MultinomialNB(), ['x', 'y'], ColumnIndex(4))
+	>>> trainer.update([({0: 1}, 'x'), ({1: 1}, 'y')])
+	>>> trainer.update([({0: 2, 2: 1}, 'x')])
+	>>> trainer.classifier().classify_many([{0: 1}, {1: 1}])
+	['x', 'y']
+	'''
+	def __init__(self, estimator, labels, feature_index, dtype=float):
+		self._estimator = clone(estimator)
+		self._labels = sorted(labels)
+		self._label_ids = dict([(label, i) for i, label in enumerate(self._labels)])
+		self._classes = numpy.arange(len(self._labels))
+		self._feature_index = feature_index
+		self._dtype = dtype
+	
+	def update(self, labeled_featuresets):
+		featuresets, labels = zip(*labeled_featuresets)
+		X = SparseSklearnClassifier._build_matrix(featuresets, self._feature_index, self._dtype)
+		y = numpy.array([self._label_ids[label] for label in labels])
+		self._estimator.partial_fit(X, y, classes=self._classes)
+	
+	def classifier(self):
+		return SparseSklearnClassifier(self._estimator, self._labels,
+			self._feature_index, dtype=self._dtype)
+
+if __name__ == '__main__':
+	import doctest
+	doctest.testmod()
@@ -0,0 +1,111 @@
+import collections, itertools, math
+from nltk.classify import NaiveBayesClassifier
+from nltk.probability import ELEProbDist, FreqDist
+from nltk_trainer import iteritems
+
+def interleave(iterables):
+	'''
+	Yield from each iterable in turn until all are exhausted, so batches of
+	labeled instances read one label at a time still mix every label.
+	
+	>>> list(interleave([[1, 2, 3], 'ab', []]))
+	[1, 'a', 2, 'b', 3]
+	'''
+	iterators = collections.deque([iter(it) for it in iterables])
+	
+	while iterators:
+		it = iterators.popleft()
+		
+		try:
+			yield next(it)
+		except StopIteration:
+			continue
+		
+		iterators.append(it)
+
+def split_stream(instances, fraction, train=True):
+	'''
+	Yield the training, or if train is False the testing, part of an
+	iteration of instances. As many instances go to training as when
+	splitting a list at ceil(n * fraction), but they are spread evenly
+	through the iteration, so n doesn't need to be known ahead of time.
+	
+	>>> list(split_stream(range(8), 0.75))
+	[0, 1, 2, 4, 5, 6]
+	>>> list(split_stream(range(8), 0.75, train=False))
+	[3, 7]
+	'''
+	for i, instance in enumerate(instances):
+		if (math.ceil((i + 1) * fraction) > math.ceil(i * fraction)) == train:
+			yield instance
+
+def batches(iterable, size):
+	'''
+	>>> list(batches(range(5), 2))
+	[[0, 1], [2, 3], [4]]
+	'''
+	it = iter(iterable)
+	batch = list(itertools.islice(it, size))
+	
+	while batch:
+		yield batch
+		batch = list(itertools.islice(it, size))
+
+class NaiveBayesTrainer(object):
+	'''
+	Accumulates the same counts as NaiveBayesClassifier.train, one batch of
+	labeled featuresets at a time, so only the counts are kept in memory.
+	The classifier is the same as from training on all the batches at once.
+	
+	>>> train = [({'a': True}, 'x'), ({'b': True}, 'y'), ({'a': True, 'b': True}, 'x')]
+	>>> trainer = NaiveBayesTrainer()
+	>>> trainer.update(train[:2])
+	>>> trainer.update(train[2:])
+	>>> pd = trainer.classifier().prob_classify({'b': True})
+	>>> pd.prob('y') == NaiveBayesClassifier.train(train).prob_classify({'b': True}).prob('y')
+	True
+	'''
+	def __init__(self, estimator=ELEProbDist):
+		self.estimator = estimator
+		self.label_freqdist = FreqDist()
+		self.feature_freqdist = collections.defaultdict(FreqDist)
+		self.feature_values = collections.defaultdict(set)
+	
+	def update(self, labeled_featuresets):
+		label_freqdist = self.label_freqdist
+		feature_freqdist = self.feature_freqdist
+		feature_values = self.feature_values
+		
+		for featureset, label in labeled_featuresets:
+			label_freqdist[label] += 1
+			
+			for fname, fval in iteritems(featureset):
+				feature_freqdist[label, fname][fval] += 1
+				feature_values[fname].add(fval)
+	
+	def classifier(self):
+		'''Return a NaiveBayesClassifier trained on every batch so far'''
+		feature_freqdist = dict([(key, fd.copy()) for key, fd in iteritems(self.feature_freqdist)])
+		feature_values = dict([(fname, set(fvals)) for fname, fvals in iteritems(self.feature_values)])
+		
+		# features missing from a featureset count as a None value, like in NaiveBayesClassifier.train
+		for label, num_samples in iteritems(self.label_freqdist):
+			for fname in feature_values:
+				fd = feature_freqdist.setdefault((label, fname), FreqDist())
+				count = fd.N()
+				
+				if num_samples - count > 0:
+					fd[None] += num_samples - count
+					feature_values[fname].add(None)
+		
+		label_probdist = self.estimator(self.label_freqdist)
+		feature_probdist = {}
+		
+		for (label, fname), freqdist in iteritems(feature_freqdist):
+			feature_probdist[label, fname] = self.estimator(freqdist, bins=len(feature_values[fname]))
+		
+		return NaiveBayesClassifier(label_probdist, feature_probdist)
+
+if __name__ == '__main__':
+	import doctest
+	doctest.testmod()
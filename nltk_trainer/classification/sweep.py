@@ -0,0 +1,160 @@
+import argparse, collections, copy, itertools, json, os.path, time
+from nltk_trainer import basestring, iteritems, pickle, process_pool
+from nltk_trainer.classification import args as classification_args, scoring
+from nltk_trainer.classification.multi import MultiBinaryClassifier
+
+def sweepable_options():
+	'''
+	Return the set of option names that can be swept, which are the
+	classifier options, and max_feats since featuresets can be filtered
+	without extracting them again.
+	'''
+	parser = argparse.ArgumentParser()
+	classification_args.add_maxent_args(parser)
+	classification_args.add_decision_tree_args(parser)
+	classification_args.add_sklearn_args(parser)
+	return set(vars(parser.parse_args([]))) | set(['classifier', 'max_feats'])
+
+def load_grid(grid):
+	'''
+	Return a dict of option names to lists of values from a JSON object, or
+	from the path of a JSON file. Single values are treated as a list of 1.
+	
+	>>> load_grid('{"classifier": "NaiveBayes", "max_feats": [10, 100]}')
+	{'classifier': ['NaiveBayes'], 'max_feats': [10, 100]}
+	'''
+	if os.path.exists(os.path.expanduser(grid)):
+		with open(os.path.expanduser(grid)) as f:
+			grid = json.load(f)
+	else:
+		grid = json.loads(grid)
+	
+	if not isinstance(grid, dict):
+		raise ValueError('sweep grid must be a JSON object of option names to lists of values')
+	
+	unknown = set(grid) - sweepable_options()
+	
+	if unknown:
+		raise ValueError('cannot sweep %s, only classifier options and max_feats can be swept' %
+			', '.join(sorted(unknown)))
+	
+	return dict([(key, vals if isinstance(vals, list) else [vals]) for key, vals in iteritems(grid)])
+
+def expand_grid(grid):
+	'''
+	Return a list of dicts for every combination of values in grid.
+	
+	>>> expand_grid({'classifier': ['NaiveBayes', 'Maxent'], 'max_feats': [10]})
+	[{'classifier': 'NaiveBayes', 'max_feats': 10}, {'classifier': 'Maxent', 'max_feats': 10}]
+	'''
+	keys = sorted(grid)
+	return [dict(zip(keys, vals)) for vals in itertools.product(*[grid[key] for key in keys])]
+
+def filter_featuresets(labeled_featuresets, featset):
+	'''Return labeled featuresets that only have the features in featset'''
+	return [(dict([(fname, fval) for fname, fval in iteritems(feats) if fname in featset]), label)
+		for feats, label in labeled_featuresets]
+
+def sweep_config(args, config, train_feats, test_feats, ranked_feats=None, labels=None):
+	'''
+	Train and test a classifier with args updated by config, and return an
+	OrderedDict of the config values, accuracy, training time in seconds and
+	pickled model size in bytes. If config has max_feats, only the first
+	max_feats of ranked_feats are kept in the featuresets. If labels are
+	given, a MultiBinaryClassifier is trained for those labels.
+	'''
+	config_args = copy.copy(args)
+	
+	for key, val in iteritems(config):
+		if key == 'classifier' and isinstance(val, basestring):
+			val = [val]
+		
+		setattr(config_args, key, val)
+	# trace output from many configs would be interleaved
+	config_args.trace = 0
+	
+	if config.get('max_feats') and ranked_feats is not None:
+		featset = set(ranked_feats[:config['max_feats']])
+		train_feats = filter_featuresets(train_feats, featset)
+		test_feats = filter_featuresets(test_feats, featset)
+	
+	trainf = classification_args.make_classifier_builder(config_args)
+	start = time.time()
+	
+	if labels:
+		classifier = MultiBinaryClassifier.train(labels, train_feats, trainf)
+	else:
+		classifier = trainf(train_feats)
+	
+	train_secs = time.time() - start
+	
+	if labels:
+		evaluation = scoring.evaluate_multi(classifier, test_feats, labels)
+	else:
+		evaluation = scoring.evaluate(classifier, test_feats)
+	
+	row = collections.OrderedDict(sorted(config.items()))
+	row['accuracy'] = evaluation.accuracy()
+	row['train_secs'] = train_secs
+	row['model_bytes'] = len(pickle.dumps(classifier))
+	return row
+
+# set in each worker process by _init_sweep_worker
+_sweep_args = None
+
+def _init_sweep_worker(*args):
+	global _sweep_args
+	_sweep_args = args
+
+def _worker_sweep_config(config):
+	args, train_feats, test_feats, ranked_feats, labels = _sweep_args
+	return sweep_config(args, config, train_feats, test_feats, ranked_feats, labels)
+
+def sweep(args, configs, train_feats, test_feats, ranked_feats=None, labels=None, jobs=1):
+	'''
+	Yield a result row from sweep_config for each config, in order. If jobs
+	is greater than 1, configs are run by a pool of forked worker processes
+	that share the featuresets.
+	'''
+	if jobs > 1:
+		pool = process_pool(min(jobs, len(configs)), _init_sweep_worker,
+			(args, train_feats, test_feats, ranked_feats, labels))
+		
+		try:
+			for row in pool.imap(_worker_sweep_config, configs):
+				yield row
+		finally:
+			pool.terminate()
+	else:
+		for config in configs:
+			yield sweep_config(args, config, train_feats, test_feats, ranked_feats, labels)
+
+def format_value(val):
+	if isinstance(val, float):
+		return '%f' % val
+	elif isinstance(val, list):
+		return ','.join([str(v) for v in val])
+	else:
+		return str(val)
+
+def format_table(rows):
+	'''
+	Return the result rows as a text table with a header of column names.
+	
+	>>> print(format_table([{'C': 1.0, 'accuracy': 0.5}, {'C': 10.0, 'accuracy': 0.75}]))
+	C          accuracy
+	1.000000   0.500000
+	10.000000  0.750000
+	'''
+	if not rows:
+		return ''
+	
+	keys = list(rows[0].keys())
+	table = [keys] + [[format_value(row[key]) for key in keys] for row in rows]
+	widths = [max([len(line[i]) for line in table]) for i in range(len(keys))]
+	return '\n'.join(['  '.join([val.ljust(width) for val, width in zip(line, widths)]).rstrip()
+		for line in table])
+
+if __name__ == '__main__':
+	import doctest
+	doctest.testmod()
@@ -0,0 +1,78 @@
+from array import array
+
+class Vocabulary(object):
+	'''
+	Interns tokens, which can be words or n-gram tuples, to compact integer
+	ids. Each unique token is stored once, and instances are kept as arrays of
+	ids, so memory scales with the number of unique tokens instead of the
+	total number of tokens.
+	
+	>>> vocab = Vocabulary()
+	>>> ids = vocab.encode(['the', 'cat', 'the', ('the', 'cat')])
+	>>> list(ids)
+	[0, 1, 0, 2]
+	>>> vocab.decode(ids)
+	['the', 'cat', 'the', ('the', 'cat')]
+	>>> len(vocab), vocab.id('cat'), vocab.id('dog')
+	(3, 1, None)
+	'''
+	typecode = 'I'
+	
+	def __init__(self, tokens=()):
+		self._ids = {}
+		self.tokens = []
+		
+		for token in tokens:
+			self.intern(token)
+	
+	def __len__(self):
+		return len(self.tokens)
+	
+	def __contains__(self, token):
+		return token in self._ids
+	
+	def __getitem__(self, i):
+		return self.tokens[i]
+	
+	def __iter__(self):
+		return iter(self.tokens)
+	
+	def id(self, token):
+		'''Return the id of a token, or None if the token is unknown'''
+		return self._ids.get(token)
+	
+	def intern(self, token):
+		'''Return the id of a token, adding it to the vocabulary if needed'''
+		i = self._ids.get(token)
+		
+		if i is None:
+			i = self._ids[token] = len(self.tokens)
+			self.tokens.append(token)
+		
+		return i
+	
+	def encode(self, tokens):
+		'''Return an array of ids for an iteration of tokens, interning any new tokens'''
+		ids = array(self.typecode)
+		known = self._ids
+		
+		for token in tokens:
+			i = known.get(token)
+			
+			if i is None:
+				i = known[token] = len(self.tokens)
+				self.tokens.append(token)
+			
+			ids.append(i)
+		
+		return ids
+	
+	def decode(self, ids):
+		'''Return a list of tokens for an iteration of ids'''
+		tokens = self.tokens
+		return [tokens[i] for i in ids]
+	
+	def idset(self, tokens):
+		'''Return the set of ids for known tokens, ignoring unknown tokens'''
+		known = self._ids
+		return set([known[t] for t in tokens if t in known])
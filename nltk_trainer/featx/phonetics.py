@@ -11,6 +11,14 @@
 import string
 import re
 
+try:
+	maketrans = string.maketrans
+except AttributeError:
+	maketrans = str.maketrans
+
+# used to translate into soundex numbers
+soundex_table = maketrans('ABCDEFGHIJKLMNOPQRSTUVWXYZ', '01230120022455012623010202')
+
 def soundex (term):
 	"Return the soundex value to a string argument."
 
@@ -28,9 +36,8 @@ def soundex (term):
 	# eAndroid / Nathan Heagy / Jul 29 2000
 	# changes by Frank Hofmann / Jan 02 2005
 
-	# generate translation table only once. used to translate into soundex numbers
-	#table = string.maketrans('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ', '0123012002245501262301020201230120022455012623010202')
-	table = string.maketrans('ABCDEFGHIJKLMNOPQRSTUVWXYZ', '01230120022455012623010202')
+	# translation table is generated only once, see soundex_table above
+	table = soundex_table
 
 	# check parameter
 	if not term:
@@ -38,14 +45,14 @@ def soundex (term):
 	# end if
 
 		# convert into uppercase letters
-	term = string.upper(term)
+	term = term.upper()
 	first_char = term[0]
 
 	# translate the string into soundex code according to the table above
-	term = string.translate(term[1:], table)
+	term = term[1:].translate(table)
 	
 	# remove all 0s
-	term = string.replace(term, "0", "")
+	term = term.replace("0", "")
 	# remove duplicate numbers in-a-row
 	str2 = first_char
 	for x in term:
@@ -83,7 +90,7 @@ def metaphone (term):
 
 	# extension #1 (added 2005-01-28)
 	# convert to lowercase
-	term = string.lower(term)
+	term = term.lower()
 	
 	# extension #2 (added 2005-01-28)
 	# remove all non-english characters, first
@@ -459,7 +466,7 @@ def caverphone (term):
 	# end if
 
 	# convert to lowercase
-	code = string.lower(term)
+	code = term.lower()
 
 	# remove anything not in the standard alphabet (a-z)
 	code = re.sub(r'[^a-z]', '', code)
@@ -543,7 +550,7 @@ def caverphone (term):
 	# replace groups of s,t,p,k,f,m,n by its single, upper-case equivalent
 	for single_letter in ["s", "t", "p", "k", "f", "m", "n"]:
 		otherParts = re.split(single_letter + "+", code)
-		code = string.join(otherParts, string.upper(single_letter))
+		code = single_letter.upper().join(otherParts)
 	
 	# replace w[3,h3] by W[3,h3]
 	code = re.sub(r'w(h?3)', r'W\1', code)
@@ -596,3 +603,290 @@ def caverphone (term):
 	# return caverphone code
 	return caverphoneCode
 
+##################
+## batch coding ##
+##################
+
+# The functions below give the same codes as the functions above, but with
+# translation tables and compiled patterns made once, and fewer passes over
+# each word. Use batch_encode to code a whole vocabulary of words.
+
+def _table(frm, to='', delete=''):
+	'''Return a str.translate table that maps each char of frm to the same index of to, and deletes each char of delete'''
+	table = dict([(ord(a), b) for a, b in zip(frm, to)])
+	table.update([(ord(c), None) for c in delete])
+	return table
+
+# soundex drops the vowels and 0 as well as any 0 the table gives
+_soundex_fast_table = _table('BCDFGJKLMNPQRSTVXZ', '123122245512623122', 'AEHIOUWY0')
+_non_alpha = re.compile(r'[^a-z]')
+_repeats = re.compile(r'(.)\1+', re.DOTALL)
+_vowels = _table('', '', 'aeiou')
+
+def _soundex(term):
+	if not term:
+		return "0000"
+	
+	term = term.upper()
+	code = term[0]
+	
+	for c in term[1:].translate(_soundex_fast_table):
+		if c != code[-1]:
+			code += c
+			# only the first 4 chars are kept
+			if len(code) == 4:
+				return code
+	
+	return (code + "0" * len(code))[:4]
+
+_metaphone_first = {"ae": "e", "gn": "n", "kn": "n", "pn": "n", "wr": "n", "wh": "w"}
+_metaphone_trans = {"b": "b", "c": "k", "d": "t", "g": "k", "h": "h", "k": "k",
+	"p": "p", "q": "k", "s": "s", "t": "t", "v": "f", "w": "w", "x": "ks",
+	"y": "y", "z": "s"}
+
+def _metaphone(term):
+	if not term:
+		return ""
+	
+	term = _non_alpha.sub('', term.lower())
+	
+	if not term:
+		return ""
+	
+	term = _repeats.sub(r'\1', term)
+	term = term[0] + term[1:].translate(_vowels)
+	code = []
+	
+	if len(term) > 1:
+		if term[:2] in _metaphone_first:
+			code.append(_metaphone_first[term[:2]])
+			term = term[2:]
+	elif term == "x":
+		return "s"
+	
+	n = len(term)
+	
+	for i, c in enumerate(term):
+		# previous and next chars, or '' past either end
+		p = term[i - 1] if i > 0 else ''
+		n1 = term[i + 1] if i < n - 1 else ''
+		n2 = term[i + 2] if i < n - 2 else ''
+		add = _metaphone_trans.get(c, c)
+		
+		if c == "b":
+			if i == n - 1 and p == "m":
+				add = ""
+		elif c == "c":
+			if n1 == "h":
+				add = "x"
+			elif n1 and n1 in "iey":
+				add = "s"
+			
+			if n1 == "i" and n2 == "a":
+				add = "x"
+			
+			if p == "s" and n1 and n1 in "iey":
+				add = ""
+		elif c == "d":
+			if n1 == "g" and n2 and n2 in "eyi":
+				add = "j"
+		elif c == "g":
+			if n1 == "h":
+				if i == n - 2:
+					add = ""
+			elif n1 == "n":
+				add = ""
+			elif p == "d" and n1 and n1 in "eyi":
+				add = ""
+			elif n1 and n1 in "iey":
+				if p != "g":
+					add = "j"
+			elif n1 == "g":
+				add = ""
+		elif c == "h":
+			if p and p in "aeiouy" and n1 and n1 not in "aeiouy":
+				add = ""
+			elif p and p in "csptg" and n1:
+				add = ""
+		elif c == "k":
+			if p == "c" and n1:
+				add = ""
+		elif c == "p":
+			if n1 == "h":
+				add = "f"
+		elif c == "s":
+			if n1 == "h" or (n1 == "i" and n2 and n2 in "ao"):
+				add = "x"
+		elif c == "t":
+			if n1 == "h":
+				add = "0"
+			
+			if n1 == "i" and n2 and n2 in "ao":
+				add = "x"
+		elif c == "w":
+			if n1 and n1 not in "aeiouy":
+				add = ""
+		
+		code.append(add)
+	
+	return "".join(code)
+
+_nysiis_first = [("mac", "mcc"), ("ph", "ff"), ("kn", "nn"), ("pf", "ff"), ("k", "c"), ("sch", "sss")]
+_nysiis_last = [("ee", "y"), ("ie", "y"), ("dt", "d"), ("rt", "d"), ("rd", "d"), ("nt", "d"), ("nd", "d")]
+_nysiis_table = _table('eiouyqzm', 'aaaaagsn')
+_nysiis_h = re.compile(r'([a-z]{0,1}?)h([a-z]{0,1}?)')
+_nysiis_w = re.compile(r'([aeiouy]{1}?)w')
+_nysiis_s = re.compile(r's$')
+_nysiis_ay = re.compile(r'ay$')
+_nysiis_a = re.compile(r'a$')
+
+def _nysiis(term):
+	if not term:
+		return ""
+	
+	for first, value in _nysiis_first:
+		# like nysiis, compares the first chars to the length of the value
+		if term[:len(value)] == first:
+			term = value + term[len(value):]
+			break
+	
+	# nysiis keeps the value length of the last first chars it tried
+	value_len = len(value)
+	
+	for last, value in _nysiis_last:
+		if term[-2:] == last:
+			term = term[:1 - value_len] + value
+			break
+	
+	code = term.replace("ev", "af").translate(_nysiis_table)
+	
+	for frm, to in [("kn", "n"), ("k", "c"), ("sch", "sss"), ("ph", "ff")]:
+		if frm in code:
+			code = code.replace(frm, to)
+	
+	# each h and w is found first, then the first occurrence of each is
+	# replaced in turn, same as nysiis
+	if "h" in code:
+		for prev, next in _nysiis_h.findall(code):
+			if prev and prev not in "aeiouy":
+				code = code.replace(prev + "h", prev * 2, 1)
+	
+	if "w" in code:
+		for prev in _nysiis_w.findall(code):
+			code = code.replace(prev + "w", prev * 2, 1)
+	
+	code = _nysiis_s.sub('', code)
+	code = _nysiis_ay.sub('y', code)
+	return _nysiis_a.sub('', code)
+
+_caverphone_ough = re.compile(r'^([crt]|(en)|(tr))ough')
+_caverphone_ciey = re.compile(r'c([iey])')
+_caverphone_tioa = re.compile(r'ti([oa])')
+_caverphone_runs = re.compile(r'([stpkfmn])\1*')
+_caverphone_wh3 = re.compile(r'w(h?3)')
+_caverphone_tables = [_table('cqxv', 'kkkf'), _table('d', 't'), _table('bz', 'ps'), _table('aeiouj', '33333y')]
+
+def _upper_run(match):
+	return match.group(1).upper()
+
+def _caverphone(term):
+	if not term:
+		return ""
+	
+	code = _non_alpha.sub('', term.lower())
+	
+	if code.endswith("e"):
+		code = code[:-1]
+	
+	if "ough" in code:
+		code = _caverphone_ough.sub(r'\1ou2f', code)
+	
+	if code.startswith("gn"):
+		code = "2n" + code[2:]
+	
+	if code.endswith("mb"):
+		code = code[:-2] + "m2"
+	
+	code = code.replace("cq", "2q")
+	code = _caverphone_ciey.sub(r's\1', code)
+	code = code.replace("tch", "2ch").translate(_caverphone_tables[0]).replace("dg", "2g")
+	code = _caverphone_tioa.sub(r'si\1', code)
+	code = code.translate(_caverphone_tables[1]).replace("ph", "fh").replace("sh", "s2")
+	code = code.translate(_caverphone_tables[2])
+	
+	if code[:1] in ("a", "e", "i", "o", "u"):
+		code = "A" + code[1:]
+	
+	code = code.translate(_caverphone_tables[3])
+	
+	if code.startswith("y3"):
+		code = "Y3" + code[2:]
+	elif code.startswith("y"):
+		code = "A" + code[1:]
+	
+	code = code.replace("y", "3").replace("3gh3", "3kh3").replace("gh", "22").replace("g", "k")
+	code = _caverphone_runs.sub(_upper_run, code)
+	code = _caverphone_wh3.sub(r'W\1', code)
+	
+	if code.endswith("w"):
+		code = code[:-1] + "3"
+	
+	code = code.replace("w", "2")
+	
+	if code.startswith("h"):
+		code = "A" + code[1:]
+	
+	code = code.replace("h", "2").replace("r3", "R3")
+	
+	if code.endswith("r"):
+		code = code[:-1] + "3"
+	
+	code = code.replace("r", "2").replace("l3", "L3")
+	
+	if code.endswith("l"):
+		code = code[:-1] + "3"
+	
+	code = code.replace("l", "2").replace("2", "")
+	
+	if code.endswith("3"):
+		code = code[:-1] + "A"
+	
+	return (code.replace("3", "") + "1" * 10)[:10]
+
+# fast coding functions by name of the function they give the same codes as
+encoders = {
+	'soundex': _soundex,
+	'metaphone': _metaphone,
+	'nysiis': _nysiis,
+	'caverphone': _caverphone
+}
+
+def batch_encode(words, algorithm):
+	'''
+	Return a list of the phonetic codes of words, which can be any iteration
+	of words such as a list or a Vocabulary, using the named algorithm. Each
+	unique word is only coded once, and the codes are the same as from the
+	function of the same name.
+	
+	>>> batch_encode(['Robert', 'Rupert', 'Robert'], 'soundex')
+	['R163', 'R163', 'R163']
+	>>> batch_encode(['knight', 'thumb'], 'metaphone') == [metaphone('knight'), metaphone('thumb')]
+	True
+	'''
+	encode = encoders[algorithm]
+	codes = {}
+	result = []
+	
+	for word in words:
+		code = codes.get(word)
+		
+		if code is None:
+			code = codes[word] = encode(word)
+		
+		result.append(code)
+	
+	return result
+
+if __name__ == '__main__':
+	import doctest
+	doctest.testmod()
@@ -0,0 +1,77 @@
+import collections, functools
+
+class LRUCache(object):
+	'''
+	Cache of up to maxsize values for the most recently used keys, counting
+	cache hits and misses.
+	
+	>>> cache = LRUCache(2)
+	>>> [cache.lookup(key, len) for key in ['a', 'bb', 'a', 'ccc', 'bb']]
+	[1, 2, 1, 3, 2]
+	>>> cache.hits, cache.misses, len(cache)
+	(1, 4, 2)
+	'''
+	def __init__(self, maxsize=100000):
+		self.maxsize = maxsize
+		self.hits = 0
+		self.misses = 0
+		self._values = collections.OrderedDict()
+	
+	def __len__(self):
+		return len(self._values)
+	
+	def __contains__(self, key):
+		return key in self._values
+	
+	def lookup(self, key, fn):
+		'''Return the cached value for key, or cache and return fn(key)'''
+		values = self._values
+		
+		try:
+			# re-insert so the key becomes the most recently used
+			value = values.pop(key)
+			self.hits += 1
+		except KeyError:
+			value = fn(key)
+			self.misses += 1
+			
+			if len(values) >= self.maxsize:
+				values.popitem(last=False)
+		
+		values[key] = value
+		return value
+	
+	def clear(self):
+		self._values.clear()
+		self.hits = 0
+		self.misses = 0
+	
+	def stats(self):
+		return 'hits: %d, misses: %d, size: %d' % (self.hits, self.misses, len(self))
+
+def memoize(maxsize=100000):
+	'''
+	Decorator for caching the results of a function of one hashable argument
+	in a LRUCache, which is available as the cache attribute of the wrapper.
+	
+	>>> @memoize(maxsize=10)
+	... def double(x):
+	...     return x * 2
+	>>> double(2), double(2), double.cache.hits
+	(4, 4, 1)
+	'''
+	def decorator(fn):
+		cache = LRUCache(maxsize)
+		
+		@functools.wraps(fn)
+		def wrapper(arg):
+			return cache.lookup(arg, fn)
+		
+		wrapper.cache = cache
+		return wrapper
+	
+	return decorator
+
+if __name__ == '__main__':
+	import doctest
+	doctest.testmod()
@@ -0,0 +1,70 @@
+import string
+from nltk_trainer.classification.featx import ngram_features
+from nltk_trainer.memo import LRUCache
+
+class WordNormalizer(object):
+	'''
+	Normalizes a list of words by lowercasing, stripping punctuation from
+	both ends of each word, filtering stopwords and stemming, then optionally
+	adds n-grams of the normalized words in one pass with ngram_features.
+	Each step is skipped if not wanted, and stems are cached in a LRUCache,
+	so words that occur often are only stemmed once.
+	
+	>>> norm = WordNormalizer(stopwords=['the'])
+	>>> norm(['The', 'cat', '"sat"', '.'])
+	['cat', 'sat']
+	>>> norm = WordNormalizer(lowercase=False, ngrams=[1, 2])
+	>>> norm(['The', 'cat', 'sat'])
+	['The', 'cat', ('The', 'cat'), 'sat', ('cat', 'sat')]
+	'''
+	def __init__(self, lowercase=True, punctuation=string.punctuation,
+			stopwords=(), stemmer=None, ngrams=None, cache_size=100000):
+		self.lowercase = lowercase
+		# the characters to strip, or None to keep punctuation
+		self.punctuation = punctuation
+		# words are lowercased before checking stopwords
+		self.stopset = frozenset([w.lower() for w in stopwords])
+		self.stemmer = stemmer
+		self.ngrams = ngrams
+		self.stem_cache = LRUCache(cache_size)
+	
+	def stem(self, word):
+		return self.stem_cache.lookup(word, self.stemmer.stem)
+	
+	def normalize(self, words):
+		'''Yield normalized words, skipping any that are filtered out'''
+		lowercase = self.lowercase
+		punctuation = self.punctuation
+		stopset = self.stopset
+		stem = self.stem if self.stemmer else None
+		
+		for word in words:
+			if lowercase:
+				word = word.lower()
+			
+			if punctuation:
+				word = word.strip(punctuation)
+				
+				if not word:
+					continue
+			
+			if stopset and (word if lowercase else word.lower()) in stopset:
+				continue
+			
+			if stem:
+				word = stem(word)
+			
+			yield word
+	
+	def __call__(self, words):
+		'''
+		Return a list of normalized words, plus n-grams if they're wanted.
+		'''
+		if self.ngrams:
+			return list(ngram_features(self.normalize(words), self.ngrams))
+		else:
+			return list(self.normalize(words))
+
+if __name__ == '__main__':
+	import doctest
+	doctest.testmod()
@@ -0,0 +1,97 @@
+from nltk.tag import untag
+from nltk_trainer import process_pool
+from nltk_trainer.classification.stream import batches
+
+# set in each worker process by _init_tagger_worker
+_worker_args = None
+
+def _init_tagger_worker(tagger, corpus=None):
+	global _worker_args
+	_worker_args = (tagger, corpus)
+
+def _worker_tag_sents(sents):
+	tagger, corpus = _worker_args
+	return tagger.tag_sents(sents)
+
+def _worker_retag_sents(tagged_sents):
+	tagger, corpus = _worker_args
+	return tagged_sents, tagger.tag_sents([untag(sent) for sent in tagged_sents])
+
+def _worker_tag_fileid_paras(fileid):
+	tagger, corpus = _worker_args
+	return [tagger.tag_sents(para) for para in corpus.paras(fileids=[fileid])]
+
+def batch_tag_sents(tagger, sents, batch_size=1000, jobs=1):
+	'''
+	Yield each tagged sentence in the same order as sents. Sentences are
+	tagged in batches of batch_size with tagger.tag_sents, and if jobs is
+	greater than 1, the batches are tagged by a pool of forked worker
+	processes, which inherit the tagger, so it's only loaded once.
+	
+	>>> from nltk.tag import DefaultTagger
+	>>> list(batch_tag_sents(DefaultTagger('NN'), [['a'], ['b', 'c']], batch_size=1))
+	[[('a', 'NN')], [('b', 'NN'), ('c', 'NN')]]
+	'''
+	if jobs > 1:
+		pool = process_pool(jobs, _init_tagger_worker, (tagger,))
+		
+		try:
+			for tagged_sents in pool.imap(_worker_tag_sents, batches(sents, batch_size)):
+				for tagged_sent in tagged_sents:
+					yield tagged_sent
+		finally:
+			pool.terminate()
+	else:
+		for batch in batches(sents, batch_size):
+			for tagged_sent in tagger.tag_sents(batch):
+				yield tagged_sent
+
+def batch_retag_sents(tagger, tagged_sents, batch_size=1000, jobs=1):
+	'''
+	Yield (tagged_sent, test_sent) pairs, where test_sent is from tagging the
+	untagged words of tagged_sent, in the same order as tagged_sents. Each
+	batch is untagged along with being tagged, so tagged_sents is only read
+	once, by a single thread, even when batches are tagged by a pool of jobs
+	worker processes.
+	
+	>>> from nltk.tag import DefaultTagger
+	>>> list(batch_retag_sents(DefaultTagger('NN'), [[('a', 'DT')], [('b', 'VB')]], batch_size=1))
+	[([('a', 'DT')], [('a', 'NN')]), ([('b', 'VB')], [('b', 'NN')])]
+	'''
+	if jobs > 1:
+		pool = process_pool(jobs, _init_tagger_worker, (tagger,))
+		
+		try:
+			for refs, tests in pool.imap(_worker_retag_sents, batches(tagged_sents, batch_size)):
+				for pair in zip(refs, tests):
+					yield pair
+		finally:
+			pool.terminate()
+	else:
+		for batch in batches(tagged_sents, batch_size):
+			for pair in zip(batch, tagger.tag_sents([untag(sent) for sent in batch])):
+				yield pair
+
+def batch_tag_fileid_paras(tagger, corpus, fileids, jobs=1):
+	'''
+	Yield a list of tagged paragraphs for each fileid in corpus, in the same
+	order as fileids. Each paragraph is a list of tagged sentences from
+	tagger.tag_sents. If jobs is greater than 1, fileids are read and tagged
+	by a pool of forked worker processes, which inherit the tagger and
+	corpus.
+	'''
+	if jobs > 1:
+		pool = process_pool(min(jobs, len(fileids)), _init_tagger_worker, (tagger, corpus))
+		
+		try:
+			for tagged_paras in pool.imap(_worker_tag_fileid_paras, fileids):
+				yield tagged_paras
+		finally:
+			pool.terminate()
+	else:
+		for fileid in fileids:
+			yield [tagger.tag_sents(para) for para in corpus.paras(fileids=[fileid])]
+
+if __name__ == '__main__':
+	import doctest
+	doctest.testmod()
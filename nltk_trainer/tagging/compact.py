@@ -0,0 +1,238 @@
+import bisect, zlib
+from array import array
+from nltk.tag import AffixTagger, BigramTagger, NgramTagger, TrigramTagger, UnigramTagger
+from nltk.tag.sequential import SequentialBackoffTagger
+from nltk_trainer import basestring
+from nltk_trainer.classification.vocab import Vocabulary
+
+def smallest_typecode(limit):
+	'''
+	Return the array typecode with the fewest bytes for integers from 0 up
+	to limit.
+	
+	>>> smallest_typecode(200), smallest_typecode(70000), smallest_typecode(2 ** 40)
+	('B', 'I', 'q')
+	'''
+	for typecode in ['B', 'H', 'I']:
+		if limit < 2 ** (8 * array(typecode).itemsize):
+			return typecode
+	
+	return 'q'
+
+class WordIndex(object):
+	'''
+	Maps a fixed set of words to ids, without a dict or a str object for each
+	word. The words are stored utf-8 encoded in one bytes buffer, with an
+	array of offsets, and an open addressing hash table of word ids keyed by
+	crc32 of the encoded word. The last lookup is remembered, since every
+	table in a backoff chain looks up the same word in turn.
+	
+	>>> index = WordIndex(['the', 'dog', 'runs'])
+	>>> index.id('dog'), index.id('cat'), index[index.id('runs')], len(index)
+	(0, None, 'runs', 3)
+	'''
+	def __init__(self, words):
+		encoded = sorted(set([word.encode('utf-8') for word in words]))
+		self._buffer = b''.join(encoded)
+		self._offsets = array('I', [0])
+		
+		for word in encoded:
+			self._offsets.append(self._offsets[-1] + len(word))
+		
+		# a power of 2 at least twice the number of words, so probe sequences are short
+		size = 2
+		
+		while size < len(encoded) * 2:
+			size *= 2
+		
+		self._mask = size - 1
+		self._slots = array('i', [-1]) * size
+		
+		for i, word in enumerate(encoded):
+			j = zlib.crc32(word) & self._mask
+			
+			while self._slots[j] >= 0:
+				j = (j + 1) & self._mask
+			
+			self._slots[j] = i
+		
+		self._last = (None, None)
+	
+	def __len__(self):
+		return len(self._offsets) - 1
+	
+	def __getitem__(self, i):
+		return self._buffer[self._offsets[i]:self._offsets[i + 1]].decode('utf-8')
+	
+	def id(self, word):
+		'''Return the id of word, or None if it's unknown'''
+		last_word, last_id = self._last
+		
+		if word == last_word:
+			return last_id
+		
+		if not isinstance(word, basestring):
+			return None
+		
+		encoded = word.encode('utf-8')
+		buffer, offsets, slots = self._buffer, self._offsets, self._slots
+		j = zlib.crc32(encoded) & self._mask
+		i = slots[j]
+		
+		while i >= 0 and buffer[offsets[i]:offsets[i + 1]] != encoded:
+			j = (j + 1) & self._mask
+			i = slots[j]
+		
+		if i < 0:
+			i = None
+		
+		self._last = (word, i)
+		return i
+
+class CompactContextTable(object):
+	'''
+	A read only replacement for the _context_to_tag dict of a ContextTagger.
+	Each context is packed into a 64 bit integer key from the ids of its
+	word and tags, and the keys are kept sorted in an array, with the tag
+	ids in a parallel array, so a lookup is a binary search. The WordIndex
+	and tag Vocabulary are shared by every table in a backoff chain.
+	
+	size is the number of previous tags in the (tags, word) contexts of an
+	NgramTagger, or None for the word contexts of a UnigramTagger or an
+	AffixTagger.
+	
+	>>> context_to_tag = {(('DT',), 'dog'): 'NN', ((), 'dog'): 'VB'}
+	>>> table = CompactContextTable(context_to_tag, 1, WordIndex(['dog']), Vocabulary(['DT', 'NN', 'VB']))
+	>>> table.get((('DT',), 'dog')), table.get(((), 'dog')), table.get((('NN',), 'dog'))
+	('NN', 'VB', None)
+	>>> len(table), sorted(table.items()) == sorted(context_to_tag.items())
+	(2, True)
+	'''
+	def __init__(self, context_to_tag, size, words, tags):
+		self._size = size
+		self._words = words
+		self._tags = tags
+		# tag ids are stored + 1, so 0 can pad contexts shorter than size
+		self._base = len(tags) + 1
+		
+		if len(words) * self._base ** (size or 0) >= 2 ** 63:
+			raise ValueError('too many words and tags to pack contexts into 64 bit keys')
+		
+		pairs = sorted([(self._key(context), tags.id(tag)) for context, tag in context_to_tag.items()])
+		self._keys = array(smallest_typecode(len(words) * self._base ** (size or 0)), [key for key, tag_id in pairs])
+		self._tag_ids = array(smallest_typecode(len(tags)), [tag_id for key, tag_id in pairs])
+	
+	def _key(self, context):
+		'''Return the packed key of a context, or None if it has an unknown word or tag'''
+		if self._size is None:
+			return self._words.id(context)
+		
+		tags, word = context
+		key = self._words.id(word)
+		
+		if key is None:
+			return None
+		
+		key *= self._base ** (self._size - len(tags))
+		
+		for tag in tags:
+			tag_id = self._tags.id(tag)
+			
+			if tag_id is None:
+				return None
+			
+			key = key * self._base + tag_id + 1
+		
+		return key
+	
+	def _context(self, key):
+		if self._size is None:
+			return self._words[key]
+		
+		tag_ids = []
+		
+		for i in range(self._size):
+			key, tag_id = divmod(key, self._base)
+			
+			if tag_id:
+				tag_ids.append(tag_id - 1)
+		
+		return tuple(self._tags.decode(reversed(tag_ids))), self._words[key]
+	
+	def __len__(self):
+		return len(self._keys)
+	
+	def __iter__(self):
+		for key in self._keys:
+			yield self._context(key)
+	
+	def get(self, context, default=None):
+		key = self._key(context)
+		
+		if key is None:
+			return default
+		
+		i = bisect.bisect_left(self._keys, key)
+		
+		if i < len(self._keys) and self._keys[i] == key:
+			return self._tags[self._tag_ids[i]]
+		else:
+			return default
+	
+	def items(self):
+		for key, tag_id in zip(self._keys, self._tag_ids):
+			yield self._context(key), self._tags[tag_id]
+
+def compact_backoff_tagger(tagger):
+	'''
+	Replace the _context_to_tag dict of every UnigramTagger, NgramTagger and
+	AffixTagger in the backoff chain of tagger with a CompactContextTable,
+	all sharing one WordIndex and one tag Vocabulary. The taggers are
+	changed in place, and tag the same as before. Returns tagger.
+	
+	>>> from nltk.tag import DefaultTagger, UnigramTagger, BigramTagger
+	>>> train = [[('the', 'DT'), ('dog', 'NN'), ('runs', 'VBZ')], [('the', 'DT'), ('runs', 'NNS')]]
+	>>> tagger = BigramTagger(train, backoff=UnigramTagger(train, backoff=DefaultTagger('NN')))
+	>>> tags = tagger.tag(['the', 'dog', 'runs', 'fast'])
+	>>> compact_backoff_tagger(tagger).tag(['the', 'dog', 'runs', 'fast']) == tags
+	True
+	'''
+	if not isinstance(tagger, SequentialBackoffTagger):
+		raise ValueError('%r is not a sequential backoff tagger' % tagger)
+	
+	sizes = []
+	
+	for t in tagger._taggers:
+		# exact classes, since a subclass may have a different context
+		cls = t.__class__
+		
+		if not isinstance(getattr(t, '_context_to_tag', None), dict):
+			continue
+		elif cls in (UnigramTagger, AffixTagger):
+			sizes.append((t, None))
+		elif cls in (NgramTagger, BigramTagger, TrigramTagger):
+			sizes.append((t, t._n - 1))
+	
+	words = set()
+	tags = Vocabulary()
+	
+	for t, size in sizes:
+		for context, tag in t._context_to_tag.items():
+			if size is None:
+				words.add(context)
+			else:
+				words.add(context[1])
+				tags.encode(context[0])
+			
+			tags.intern(tag)
+	
+	words = WordIndex(words)
+	
+	for t, size in sizes:
+		t._context_to_tag = CompactContextTable(t._context_to_tag, size, words, tags)
+	
+	return tagger
+
+if __name__ == '__main__':
+	import doctest
+	doctest.testmod()
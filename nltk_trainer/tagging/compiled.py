@@ -0,0 +1,265 @@
+import collections, itertools
+from nltk.tag import AffixTagger, BigramTagger, DefaultTagger, NgramTagger, TrigramTagger, UnigramTagger
+from nltk.tag.sequential import SequentialBackoffTagger
+
+def affix_context(word, affix_length, min_word_length):
+	'''Return the same context for word as an AffixTagger'''
+	if len(word) < min_word_length:
+		return None
+	elif affix_length > 0:
+		return word[:affix_length]
+	else:
+		return word[affix_length:]
+
+def word_levels_tag(levels, word):
+	'''
+	Return the tag of word from the first of levels that has one, where
+	levels are ('unigram', table), ('affix', affix_length, min_word_length,
+	table) or ('default', tag), for taggers that only look at the word.
+	'''
+	for level in levels:
+		if level[0] == 'unigram':
+			tag = level[1].get(word)
+		elif level[0] == 'affix':
+			tag = level[3].get(affix_context(word, level[1], level[2]))
+		else:
+			tag = level[1]
+		
+		if tag is not None:
+			return tag
+	
+	return None
+
+class AffixTable(object):
+	'''
+	Looks up the tag of a word that is unknown to a run of UnigramTaggers,
+	from the AffixTaggers and DefaultTagger in the run. The AffixTaggers are
+	merged into a suffix trie and a prefix trie, so each affix takes one
+	walk down a trie instead of a lookup in each AffixTagger.
+	
+	>>> table = AffixTable([('affix', -2, 0, {'ly': 'RB', 'ed': 'VBD'}), ('default', 'NN')])
+	>>> [table.get(word) for word in ['quickly', 'walked', 'dog']]
+	['RB', 'VBD', 'NN']
+	'''
+	def __init__(self, levels):
+		self._affixes = []
+		# each trie node is a tuple of (tags by affix rank, child nodes by character)
+		self._suffixes = ({}, {})
+		self._prefixes = ({}, {})
+		self._default = None
+		
+		for level in levels:
+			if level[0] == 'affix':
+				affix_length, min_word_length, table = level[1:]
+				rank = len(self._affixes)
+				self._affixes.append((rank, affix_length, min_word_length))
+				trie = self._suffixes if affix_length < 0 else self._prefixes
+				
+				for affix, tag in table.items():
+					node = trie
+					
+					for c in (affix[::-1] if affix_length < 0 else affix):
+						node = node[1].setdefault(c, ({}, {}))
+					
+					node[0][rank] = tag
+			elif level[0] == 'default':
+				self._default = level[1]
+	
+	def get(self, word):
+		for rank, affix_length, min_word_length in self._affixes:
+			if len(word) < min_word_length:
+				continue
+			
+			if affix_length < 0:
+				node, chars = self._suffixes, reversed(word)
+			else:
+				node, chars = self._prefixes, iter(word)
+			
+			for c in itertools.islice(chars, abs(affix_length)):
+				node = node[1].get(c)
+				
+				if node is None:
+					break
+			
+			if node is not None and rank in node[0]:
+				return node[0][rank]
+		
+		return self._default
+
+class CompiledBackoffTagger(SequentialBackoffTagger):
+	'''
+	Tags the same as a chain of sequential backoff taggers, with one lookup
+	of the word for each token, instead of a choose_tag call and a context
+	lookup for each tagger in the chain. Each known word has an entry with
+	a dict of tag contexts for each NgramTagger that knows the word, and the
+	precomputed tag of each run of taggers that only look at the word, such
+	as UnigramTaggers, AffixTaggers and a DefaultTagger. Unknown words go
+	through the AffixTable of each run. Use compile_backoff_tagger to create
+	one.
+	'''
+	def __init__(self, index, affix_tables, max_context, backoff=None):
+		SequentialBackoffTagger.__init__(self, backoff)
+		# word -> tuple of (number of previous tags, dict of tag contexts to
+		# tags) for ngram tables, or (0, tag) for word tables, in backoff order
+		self._index = index
+		self._affix_tables = affix_tables
+		self._max_context = max_context
+	
+	def __repr__(self):
+		return '<CompiledBackoffTagger: size=%d>' % self.size()
+	
+	def size(self):
+		return len(self._index)
+	
+	def _unknown_tag(self, word):
+		for table in self._affix_tables:
+			tag = table.get(word)
+			
+			if tag is not None:
+				return tag
+		
+		return None
+	
+	def choose_tag(self, tokens, index, history):
+		word = tokens[index]
+		entry = self._index.get(word)
+		
+		if entry is None:
+			return self._unknown_tag(word)
+		
+		for context, lookup in entry:
+			if not context:
+				return lookup
+			
+			tag = lookup.get(tuple(history[max(0, index - context):index]))
+			
+			if tag is not None:
+				return tag
+		
+		return None
+	
+	def tag(self, tokens):
+		# same as choose_tag for each token, but without a method call per
+		# token, and with tag contexts sliced from a tuple of the last tags
+		index = self._index
+		max_context = self._max_context
+		backoff = self.backoff
+		recent = ()
+		tags = []
+		
+		for word in tokens:
+			tag = None
+			entry = index.get(word)
+			
+			if entry is None:
+				tag = self._unknown_tag(word)
+			else:
+				for context, lookup in entry:
+					if not context:
+						tag = lookup
+						break
+					
+					tag = lookup.get(recent[-context:])
+					
+					if tag is not None:
+						break
+			
+			if tag is None and backoff is not None:
+				tag = backoff.tag_one(tokens, len(tags), tags)
+			
+			tags.append(tag)
+			
+			if max_context:
+				recent = (recent + (tag,))[-max_context:]
+		
+		return list(zip(tokens, tags))
+
+def compile_backoff_tagger(tagger):
+	'''
+	Return a CompiledBackoffTagger that tags the same as the backoff chain of
+	tagger, which can have NgramTaggers, UnigramTaggers, AffixTaggers and a
+	DefaultTagger. The first tagger in the chain that can't be compiled
+	becomes the backoff of the CompiledBackoffTagger.
+	
+	>>> from nltk.tag import DefaultTagger, UnigramTagger, BigramTagger
+	>>> train = [[('the', 'DT'), ('dog', 'NN'), ('runs', 'VBZ')], [('the', 'DT'), ('runs', 'NNS')]]
+	>>> tagger = BigramTagger(train, backoff=UnigramTagger(train, backoff=DefaultTagger('NN')))
+	>>> compiled = compile_backoff_tagger(tagger)
+	>>> compiled.tag(['the', 'dog', 'runs', 'fast']) == tagger.tag(['the', 'dog', 'runs', 'fast'])
+	True
+	'''
+	if not isinstance(tagger, SequentialBackoffTagger):
+		raise ValueError('%r is not a sequential backoff tagger' % tagger)
+	
+	# each table is (number of previous tags, ngram table) or (0, word levels)
+	tables = []
+	levels = []
+	backoff = None
+	
+	for t in tagger._taggers:
+		# exact classes, since a subclass may have a different context
+		cls = t.__class__
+		
+		if cls is UnigramTagger:
+			levels.append(('unigram', t._context_to_tag))
+		elif cls is NgramTagger and t._n == 1:
+			# the context is the word with an empty tuple of tags
+			levels.append(('unigram', dict([(word, tag) for (tags, word), tag in t._context_to_tag.items()])))
+		elif cls is AffixTagger and t._affix_length:
+			levels.append(('affix', t._affix_length, t._min_word_length, t._context_to_tag))
+		elif cls is DefaultTagger:
+			levels.append(('default', t._tag))
+			break
+		elif cls in (NgramTagger, BigramTagger, TrigramTagger):
+			if levels:
+				tables.append((0, levels))
+				levels = []
+			
+			tables.append((t._n - 1, t._context_to_tag))
+		else:
+			backoff = t
+			break
+	
+	if levels:
+		tables.append((0, levels))
+	
+	if not tables:
+		raise ValueError('%r has no backoff taggers that can be compiled' % tagger)
+	
+	# every word known to an ngram or unigram table gets an entry
+	words = collections.defaultdict(lambda: [{} if context else None for context, table in tables])
+	
+	for i, (context, table) in enumerate(tables):
+		if context:
+			for (tags, word), tag in table.items():
+				words[word][i][tags] = tag
+		else:
+			for level in table:
+				if level[0] == 'unigram':
+					for word in level[1]:
+						words[word]
+	
+	index = {}
+	
+	for word, lookups in words.items():
+		entry = []
+		
+		for (context, table), lookup in zip(tables, lookups):
+			if context and lookup:
+				entry.append((context, lookup))
+			elif not context:
+				tag = word_levels_tag(table, word)
+				# a word table with a tag ends the entry, since later tables aren't reached
+				if tag is not None:
+					entry.append((0, tag))
+					break
+		
+		index[word] = tuple(entry)
+	
+	affix_tables = [AffixTable(table) for context, table in tables if not context]
+	max_context = max([context for context, table in tables])
+	return CompiledBackoffTagger(index, affix_tables, max_context, backoff=backoff)
+
+if __name__ == '__main__':
+	import doctest
+	doctest.testmod()
@@ -1,37 +1,104 @@
 from nltk.tag.sequential import SequentialBackoffTagger
 from nltk.probability import FreqDist
 from nltk.tag import ClassifierBasedPOSTagger, TaggerI, str2tuple
-from nltk_trainer import iteritems
+from nltk_trainer import iteritems, unicode
 from nltk_trainer.featx import phonetics
 from nltk_trainer.featx.metaphone import dm
+from nltk_trainer.memo import LRUCache
+
+def double_metaphone(word):
+	return dm(unicode(word))
+
+# phonetic feature functions by feature name, module level so taggers pickle
+phonetic_funs = {
+	'double-metaphone': double_metaphone,
+	'metaphone': phonetics.metaphone,
+	'soundex': phonetics.soundex,
+	'nysiis': phonetics.nysiis,
+	'caverphone': phonetics.caverphone
+}
+
+def phonetic_codes(words, keys):
+	'''
+	Return a dict of each word to a tuple of its phonetic codes, from the
+	phonetic_funs of keys in order. Codes are made with
+	phonetics.batch_encode where it has the same algorithm.
+	
+	>>> phonetic_codes(['Robert'], ['metaphone', 'soundex'])
+	{'Robert': ('rbrt', 'R163')}
+	'''
+	words = list(words)
+	columns = []
+	
+	for key in keys:
+		if key in phonetics.encoders:
+			columns.append(phonetics.batch_encode(words, key))
+		else:
+			columns.append([phonetic_funs[key](word) for word in words])
+	
+	return dict(zip(words, zip(*columns)))
 
 class PhoneticClassifierBasedPOSTagger(ClassifierBasedPOSTagger):
+	'''
+	A ClassifierBasedPOSTagger with phonetic codes of each word as extra
+	features. The codes of every word in the training sentences are computed
+	once into phonetic_table, which is pickled with the tagger. Codes of
+	other words are cached in a LRUCache of up to cache_size words for each
+	phonetic function, and phonetic_caches has the caches by feature name.
+	'''
 	def __init__(self, double_metaphone=False, metaphone=False, soundex=False, nysiis=False, caverphone=False, *args, **kwargs):
-		self.funs = {}
-		
-		if double_metaphone:
-			self.funs['double-metaphone'] = lambda s: dm(unicode(s))
+		wanted = {
+			'double-metaphone': double_metaphone,
+			'metaphone': metaphone,
+			'soundex': soundex,
+			'nysiis': nysiis,
+			'caverphone': caverphone
+		}
 		
-		if metaphone:
-			self.funs['metaphone'] = phonetics.metaphone
+		self.phonetic_keys = tuple(sorted([key for key, want in wanted.items() if want]))
+		self.cache_size = kwargs.pop('cache_size', 100000)
+		self._init_caches()
+		self.phonetic_table = {}
+		train = kwargs.get('train')
 		
-		if soundex:
-			self.funs['soundex'] = phonetics.soundex
-		
-		if nysiis:
-			self.funs['nysiis'] = phonetics.nysiis
-		
-		if caverphone:
-			self.funs['caverphone'] = phonetics.caverphone
-		# for some reason don't get self.funs if this is done first, but works if done last
+		if train:
+			# a list, since the words are read here and again for training
+			kwargs['train'] = train = list(train)
+			words = set([word for sent in train for word, tag in sent])
+			self.phonetic_table = phonetic_codes(words, self.phonetic_keys)
+		# training happens in __init__, so everything the feature_detector
+		# uses must be set first
 		ClassifierBasedPOSTagger.__init__(self, *args, **kwargs)
 	
+	def _init_caches(self):
+		self.phonetic_caches = dict([(key, LRUCache(self.cache_size)) for key in self.phonetic_keys])
+	
+	def __getstate__(self):
+		# caches are rebuilt when unpickled, only the table is kept
+		state = self.__dict__.copy()
+		del state['phonetic_caches']
+		return state
+	
+	def __setstate__(self, state):
+		if 'funs' in state:
+			# pickled before the phonetic table
+			state['phonetic_keys'] = tuple(sorted(state.pop('funs')))
+			state.setdefault('cache_size', 100000)
+			state.setdefault('phonetic_table', {})
+		
+		self.__dict__.update(state)
+		self._init_caches()
+	
 	def feature_detector(self, tokens, index, history):
 		feats = ClassifierBasedPOSTagger.feature_detector(self, tokens, index, history)
 		s = tokens[index]
+		codes = self.phonetic_table.get(s)
 		
-		for key, fun in iteritems(self.funs):
-			feats[key] = fun(s)
+		if codes is not None:
+			feats.update(zip(self.phonetic_keys, codes))
+		else:
+			for key in self.phonetic_keys:
+				feats[key] = self.phonetic_caches[key].lookup(s, phonetic_funs[key])
 		
 		return feats
 
@@ -53,4 +120,8 @@ class PatternTagger(TaggerI):
 		from pattern.en import tag
 		# not tokenizing ensures that the number of tagged tokens returned is
 		# the same as the number of input tokens
-		return tag(u' '.join(tokens), tokenize=False)
\ No newline at end of file
+		return tag(u' '.join(tokens), tokenize=False)
+
+if __name__ == '__main__':
+	import doctest
+	doctest.testmod()
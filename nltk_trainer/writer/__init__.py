@@ -39,7 +39,7 @@ class CorpusWriter(object):
 		return self
 	
 	def close(self, *args, **kwargs):
-		for fileid, f in self.files.items():
+		for fileid, f in list(self.files.items()):
 			if self.trace:
 				print('closing %s' % fileid)
 			
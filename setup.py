@@ -30,6 +30,7 @@ setup(
 		'analyze_tagged_corpus.py',
 		'analyze_tagger_coverage.py',
 		'combine_classifiers.py',
+		'compile_classifier.py',
 		'train_chunker.py',
 		'train_classifier.py',
 		'train_tagger.py',
@@ -1,8 +1,8 @@
 #!/usr/bin/env python
-import argparse, os.path
-import cPickle as pickle
+import argparse
 import nltk.data, nltk.tag
-from nltk_trainer import load_corpus_reader
+from nltk_trainer import load_corpus_reader, load_model
+from nltk_trainer.tagging.batch import batch_tag_fileid_paras
 from nltk_trainer.writer.chunked import ChunkedCorpusWriter
 
 ########################################
@@ -17,9 +17,12 @@ parser.add_argument('source_corpus', help='corpus name/path relative to an nltk_
 parser.add_argument('target_corpus', help='corpus name/path relative to an nltk_data directory')
 parser.add_argument('--trace', default=1, type=int,
 	help='How much trace output you want, defaults to 1. 0 is no trace output.')
-parser.add_argument('--tagger', default=nltk.tag._POS_TAGGER,
+parser.add_argument('--tagger', default=None,
 	help='''pickled tagger filename/path relative to an nltk_data directory
 default is NLTK's default tagger''')
+parser.add_argument('--jobs', default=1, type=int,
+	help='''Number of worker processes to tag source corpus files with, defaults to
+%(default)d. Files are written to the target corpus in fileid order.''')
 
 # TODO: from analyze_tagged_corpus.py
 corpus_group = parser.add_argument_group('Corpus Reader Options')
@@ -57,22 +60,18 @@ if args.trace:
 if args.trace:
 	print('loading tagger %s' % args.tagger)
 
-try:
-	tagger = nltk.data.load(args.tagger)
-except LookupError:
-	try:
-		import cPickle as pickle
-	except ImportError:
-		import pickle
-	
-	tagger = pickle.load(open(os.path.expanduser(args.tagger)))
+if not args.tagger:
+	tagger = nltk.tag._get_tagger()
+else:
+	tagger = load_model(args.tagger)
 
 #############
 ## tagging ##
 #############
 
-with ChunkedCorpusWriter(fileids=source_corpus.fileids(), path=args.target_corpus) as writer:
-	for fileid in source_corpus.fileids():
-		paras = source_corpus.paras(fileids=[fileid])
-		tagged_paras = ((tagger.tag(sent) for sent in para) for para in paras)
+fileids = source_corpus.fileids()
+tagged_fileids = batch_tag_fileid_paras(tagger, source_corpus, fileids, jobs=args.jobs)
+
+with ChunkedCorpusWriter(fileids=fileids, path=args.target_corpus) as writer:
+	for fileid, tagged_paras in zip(fileids, tagged_fileids):
 		writer.write_paras(tagged_paras, fileid=fileid)
\ No newline at end of file
@@ -52,4 +52,16 @@ it_analyzes_treebank_simplify_tags_metrics() {
 	two_lines=$(./analyze_tagger_coverage.py treebank --simplify_tags --metrics --fraction 0.5 2>&1 | head -n 5 | tail -n 2)
 	echo "$two_lines" | grep -q "Accuracy:"
 	echo "$two_lines" | grep -q "Unknown words:"
-}
\ No newline at end of file
+}
+
+it_analyzes_treebank_metrics_jobs() {
+	one_job=$(./analyze_tagger_coverage.py treebank --metrics --fraction 0.5 2>&1)
+	two_jobs=$(./analyze_tagger_coverage.py treebank --metrics --fraction 0.5 --jobs 2 2>&1)
+	test "$one_job" "=" "$two_jobs"
+}
+
+it_analyzes_all_treebank_metrics_jobs() {
+	two_lines=$(./analyze_tagger_coverage.py treebank --metrics --jobs 2 2>&1 | head -n 5 | tail -n 2)
+	echo "$two_lines" | grep -q "Accuracy:"
+	echo "$two_lines" | grep -q "Unknown words:"
+}
@@ -32,11 +32,36 @@ using bag of words feature extraction
 training NaiveBayes classifier"	
 }
 
+it_trains_movie_reviews_paras_with_jobs() {
+	test "$(./train_classifier.py movie_reviews --no-pickle --no-eval --fraction 0.5 --instances paras --jobs 2)" "=" "loading movie_reviews
+2 labels: ['neg', 'pos']
+using bag of words feature extraction
+1000 training feats, 1000 testing feats
+training NaiveBayes classifier"
+}
+
+it_trains_movie_reviews_paras_with_stream() {
+	test "$(./train_classifier.py movie_reviews --no-pickle --no-eval --fraction 0.5 --instances paras --stream)" "=" "loading movie_reviews
+2 labels: ['neg', 'pos']
+using bag of words feature extraction on streamed instances
+training NaiveBayes classifier in batches of 1000"
+}
+
 it_cross_fold_validates() {
 	folds=$(./train_classifier.py movie_reviews --cross-fold 3 2>&1|grep "training NaiveBayes classifier" -c)
 	test $folds -eq 3
 }
 
+it_cross_fold_validates_with_jobs() {
+	folds=$(./train_classifier.py movie_reviews --cross-fold 3 --jobs 3 2>&1|grep "^fold [123]$" -c)
+	test $folds -eq 3
+}
+
+it_sweeps_classifier_options() {
+	configs=$(./train_classifier.py movie_reviews --fraction 0.5 --trace 0 --sweep '{"classifier": "NaiveBayes", "max_feats": [10, 100]}' | grep "^NaiveBayes" -c)
+	test $configs -eq 2
+}
+
 it_trains_movie_reviews_sents() {
 	test "$(./train_classifier.py movie_reviews --no-pickle --no-eval --fraction 0.5 --instances sents)" "=" "loading movie_reviews
 2 labels: ['neg', 'pos']
@@ -61,6 +86,24 @@ it_passes_parameters_to_gradient_boosting_classifier() {
 	test "$classifier_line" "=" "training sklearn.GradientBoostingClassifier with {'n_estimators': 3, 'learning_rate': 0.9, 'max_depth': 2}" 
 }
 
+it_trains_gaussian_nb_with_dense_row_batches() {
+	dense_line=$(./train_classifier.py movie_reviews --classifier sklearn.GaussianNB --no-pickle --no-eval --fraction 0.5 --max_feats 100 --trace 2 | grep dense)
+	test "$dense_line" "=" "using dense row batches"
+}
+
+it_trains_decision_tree_with_bigrams() {
+	stumps=$(./train_classifier.py movie_reviews --no-pickle --no-eval --fraction 0.5 --classifier DecisionTree --ngrams 1 2 --max_feats 100 --depth_cutoff 1 | grep -c "best stump for   1000 toks")
+	test "$stumps" "=" "1"
+}
+
+it_trains_lbfgs_maxent() {
+	test "$(./train_classifier.py movie_reviews --no-pickle --no-eval --fraction 0.5 --classifier LBFGS --max_iter 20)" "=" "loading movie_reviews
+2 labels: ['neg', 'pos']
+using bag of words feature extraction
+1000 training feats, 1000 testing feats
+training LBFGS classifier"
+}
+
 it_trains_with_word_count() {
 	test "$(./train_classifier.py movie_reviews --no-pickle --no-eval --fraction 0.5 --value-type int)" "=" "loading movie_reviews
 2 labels: ['neg', 'pos']
@@ -79,6 +122,35 @@ using bag of words from known set feature extraction
 training NaiveBayes classifier"
 }
 
+it_trains_with_sketched_max_feats() {
+	test "$(./train_classifier.py movie_reviews --no-pickle --no-eval --fraction 0.5 --max_feats 100 --sketch-size 5000)" "=" "loading movie_reviews
+2 labels: ['neg', 'pos']
+calculating word scores in sketches of 5000 words
+100 words meet min_score and/or max_feats
+using bag of words feature extraction
+1000 training feats, 1000 testing feats
+training NaiveBayes classifier"
+}
+
+it_compiles_naive_bayes() {
+	test "$(./train_classifier.py movie_reviews --no-eval --fraction 0.5 --compile --filename /tmp/movie_reviews_compiled.pickle)" "=" "loading movie_reviews
+2 labels: ['neg', 'pos']
+using bag of words feature extraction
+1000 training feats, 1000 testing feats
+training NaiveBayes classifier
+compiling classifier
+dumping CompiledNaiveBayesClassifier to /tmp/movie_reviews_compiled.pickle"
+}
+
+it_trains_with_hashed_features() {
+	test "$(./train_classifier.py movie_reviews --no-pickle --no-eval --fraction 0.5 --ngrams 1 2 --hash-features 16)" "=" "loading movie_reviews
+2 labels: ['neg', 'pos']
+hashing features into 16 bits
+using bag of words feature extraction
+1000 training feats, 1000 testing feats
+training NaiveBayes classifier"
+}
+
 it_trains_multi_binary() {
 	test "$(./train_classifier.py problem_reports --cat_pattern '([a-z]*)' --instances sents --multi --binary --no-pickle | sed 's/[01]\.[0-9][0-9]*/<pct>/g')" "=" "loading problem_reports
 5 labels: ['apache', 'eclipse', 'firefox', 'linux', 'openoffice']
@@ -46,6 +46,28 @@ training <class 'nltk.tag.sequential.UnigramTagger'> tagger with backoff <Defaul
 training <class 'nltk.tag.sequential.BigramTagger'> tagger with backoff <UnigramTagger: size=8435>"
 }
 
+it_compiles_ub() {
+	compiled=$(./train_tagger.py treebank --sequential ub --compile --no-pickle --no-eval --fraction 0.5 | grep -c "compiling backoff taggers from <BigramTagger")
+	test "$compiled" "=" "1"
+}
+
+it_compiles_ub_with_same_accuracy() {
+	accuracy=$(./train_tagger.py treebank --sequential ub --no-pickle --fraction 0.5 | grep "^accuracy:")
+	compiled=$(./train_tagger.py treebank --sequential ub --compile --no-pickle --fraction 0.5 | grep "^accuracy:")
+	test "$compiled" "=" "$accuracy"
+}
+
+it_compacts_ub() {
+	compacted=$(./train_tagger.py treebank --sequential ub --compact --no-pickle --no-eval --fraction 0.5 | grep -c "compacting context tables of <BigramTagger")
+	test "$compacted" "=" "1"
+}
+
+it_compacts_ub_with_same_accuracy() {
+	accuracy=$(./train_tagger.py treebank --sequential ub --no-pickle --fraction 0.5 | grep "^accuracy:")
+	compacted=$(./train_tagger.py treebank --sequential ub --compact --no-pickle --fraction 0.5 | grep "^accuracy:")
+	test "$compacted" "=" "$accuracy"
+}
+
 it_trains_naive_bayes_classifier() {
 	test "$(./train_tagger.py treebank --sequential '' --classifier NaiveBayes --no-pickle --no-eval --fraction 0.5)" "=" "loading treebank
 3914 tagged sents, training on 1957
@@ -55,6 +77,11 @@ Training classifier (50641 instances)
 training NaiveBayes classifier"
 }
 
+it_caches_phonetic_features() {
+	cached=$(./train_tagger.py treebank --sequential '' --classifier NaiveBayes --metaphone --no-pickle --fraction 0.5 | grep -c "^metaphone cache hits: ")
+	test "$cached" "=" "1"
+}
+
 it_trains_treebank_simplify_tags() {
 	test "$(./train_tagger.py treebank --simplify_tags --no-pickle --no-eval --fraction 0.5)" "=" "loading treebank
 3914 tagged sents, training on 1957
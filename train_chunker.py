@@ -4,6 +4,7 @@ import nltk.tag, nltk.chunk, nltk.chunk.util
 import nltk_trainer.classification.args
 from nltk.corpus.reader import IEERCorpusReader
 from nltk_trainer import dump_object, load_corpus_reader, simplify_wsj_tag
+from nltk_trainer.cache import unwrap_reader
 from nltk_trainer.chunking import chunkers, transforms
 
 ########################################
@@ -33,6 +34,9 @@ corpus_group.add_argument('--fileids', default=None,
 	help='Specify fileids to load from corpus')
 corpus_group.add_argument('--fraction', default=1.0, type=float,
 	help='Fraction of corpus to use for training, defaults to %(default)f')
+corpus_group.add_argument('--cache-dir', default=None,
+	help='''Directory for caching the tokenized corpus, so later runs with the
+same corpus can skip tokenization''')
 corpus_group.add_argument('--flatten-deep-tree', action='store_true', default=False,
 	help='''Flatten deep trees from parsed_sents() instead of chunked_sents().
 Cannot be combined with --shallow-tree.''')
@@ -77,7 +81,8 @@ args = parser.parse_args()
 if args.trace:
 	print('loading %s' % args.corpus)
 
-chunked_corpus = load_corpus_reader(args.corpus, reader=args.reader, fileids=args.fileids)
+chunked_corpus = load_corpus_reader(args.corpus, reader=args.reader, fileids=args.fileids,
+	cache_dir=args.cache_dir)
 chunked_corpus.fileids()
 fileids = args.fileids
 kwargs = {}
@@ -96,7 +101,7 @@ elif not simplify_wsj_tag and args.tagset:
 	if args.trace:
 		print('using %s tagset' % args.tagset)
 
-if isinstance(chunked_corpus, IEERCorpusReader):
+if isinstance(unwrap_reader(chunked_corpus), IEERCorpusReader):
 	chunk_trees = []
 	
 	if args.trace:
@@ -1,20 +1,22 @@
 #!/usr/bin/env python
-import argparse, collections, functools, itertools, math, operator, os.path, re, string, sys
+import argparse, collections, itertools, json, math, os.path, re, string, sys
 import nltk.data
 import nltk_trainer.classification.args
 from nltk.classify import DecisionTreeClassifier, MaxentClassifier, NaiveBayesClassifier
-from nltk.classify.util import accuracy
 from nltk.corpus import stopwords
 from nltk.corpus.reader import CategorizedPlaintextCorpusReader, CategorizedTaggedCorpusReader
 from nltk.corpus.util import LazyCorpusLoader
-from nltk.metrics import BigramAssocMeasures, f_measure, masi_distance, precision, recall
+from nltk.metrics import BigramAssocMeasures, masi_distance
 from nltk.probability import FreqDist, ConditionalFreqDist
-from nltk.util import ngrams
-from nltk_trainer import dump_object, import_attr, iteritems, load_corpus_reader
-from nltk_trainer.classification import corpus, scoring
-from nltk_trainer.classification.featx import (bag_of_words, bag_of_words_in_set,
-	word_counts, train_test_feats, word_counts_in_set)
+from nltk_trainer import cache, dump_object, import_attr, iteritems, load_corpus_reader
+from nltk_trainer.classification import corpus, scoring, stream, sweep
+from nltk_trainer.classification.featx import (bag_of_ids, bag_of_ids_in_set,
+	id_counts, id_counts_in_set, bag_of_words, word_counts, hashed_bag_of_words,
+	hashed_word_counts, dump_hash_config, FeatureHasher, HashedVocabulary)
 from nltk_trainer.classification.multi import MultiBinaryClassifier
+from nltk_trainer.classification.naivebayes import compile_classifier
+from nltk_trainer.classification.vocab import Vocabulary
+from nltk_trainer.normalize import WordNormalizer
 from nltk.stem import PorterStemmer
 
 ########################################
@@ -29,6 +31,9 @@ parser.add_argument('--filename', help='''filename/path for where to store the
 	~/nltk_data/classifiers''')
 parser.add_argument('--no-pickle', action='store_true', default=False,
 	help="don't pickle and save the classifier")
+parser.add_argument('--compile', action='store_true', default=False,
+	help='''compile NaiveBayes classifiers into NumPy tables before pickling,
+	for faster classification''')
 parser.add_argument('--classifier', '--algorithm', default=['NaiveBayes'], nargs='+',
 	choices=nltk_trainer.classification.args.classifier_choices,
 	help='''Classifier algorithm to use, defaults to %(default)s. Maxent uses the
@@ -37,6 +42,19 @@ parser.add_argument('--trace', default=1, type=int,
 	help='How much trace output you want, defaults to 1. 0 is no trace output.')
 parser.add_argument('--show-most-informative', default=0, type=int,
 	help='number of most informative features to show, works for all algorithms except DecisionTree')
+parser.add_argument('--jobs', default=1, type=int,
+	help='''Number of worker processes for reading and normalizing corpus files,
+	for training folds in parallel with --cross-fold, and for training label
+	classifiers in parallel with --multi --binary. Defaults to %(default)d,
+	which does everything in this process''')
+parser.add_argument('--stream', action='store_true', default=False,
+	help='''Train incrementally on batches of featuresets read from the corpus,
+	instead of holding every instance in memory, for corpora that are larger
+	than memory. Works with NaiveBayes, and with sklearn classifiers that have
+	partial_fit if --hash-features is also given. Testing featuresets are read
+	again from the corpus in batches.''')
+parser.add_argument('--batch-size', default=1000, type=int,
+	help='number of instances in each --stream batch, defaults to %(default)d')
 
 corpus_group = parser.add_argument_group('Training Corpus')
 corpus_group.add_argument('--reader',
@@ -69,6 +87,10 @@ corpus_group.add_argument('--sent-tokenizer', default='', help='Sent Tokenizer d
 corpus_group.add_argument('--para-block-reader', default='', help='Block reader function path')
 corpus_group.add_argument('--labels', default=[],
 	help='''If given a list of labels, default categories by corpus are omitted''')
+corpus_group.add_argument('--cache-dir', default=None,
+	help='''Directory for caching the tokenized corpus, normalized instances and
+	extracted featuresets, so later runs with the same corpus and options can
+	skip tokenization, normalization and feature extraction''')
 
 classifier_group = parser.add_argument_group('Classifier Type',
 	'''A binary classifier has only 2 labels, and is the default classifier type.
@@ -96,6 +118,11 @@ feat_group.add_argument('--value-type', default='bool', choices=('bool', 'int',
 	Use int to get word and/or ngram counts.''')
 feat_group.add_argument('--stem-words', action='store_true', default=False,
 	help='''Performs word stemming on all of the words.''')
+feat_group.add_argument('--hash-features', default=0, type=int, metavar='BITS',
+	help='''Hash words and ngrams into 2**BITS integer features, to limit the
+	size of featuresets and models. The hashing config is stored next to the
+	pickled classifier, so classify_corpus.py and analyze_classifier_coverage.py
+	use the same features.''')
 
 score_group = parser.add_argument_group('Feature Scoring',
 	'The default is no scoring, all words are included as features')
@@ -106,6 +133,12 @@ score_group.add_argument('--min_score', default=0, type=int,
 	help='minimum score for a word to be included, default is 0 to include all words')
 score_group.add_argument('--max_feats', default=0, type=int,
 	help='maximum number of words to include, ordered by highest score, defaults is 0 to include all words')
+score_group.add_argument('--sketch-size', default=0, type=int,
+	help='''Score words in a fixed amount of memory by only tracking approximate
+	counts for this many of the most frequent words in each category. Words
+	are scored while reading the corpus, before any are given ids, and the
+	training instances are spread over each category as with --stream. The
+	default is 0 to count every word exactly.''')
 
 eval_group = parser.add_argument_group('Classifier Evaluation',
 	'''The default is to test the classifier against the unused fraction of the
@@ -128,6 +161,17 @@ eval_group.add_argument('--cross-fold', type=int, default=0,
 	is useless with --trace 0 and/or --no-eval, and currently does not work
 	with --multi --binary.
 	''')
+eval_group.add_argument('--sweep', metavar='GRID',
+	help='''Train and test a classifier for every combination of values in GRID,
+	a JSON object of option names to lists of values, or the path of a JSON
+	file, such as '{"classifier": ["NaiveBayes", "sklearn.LogisticRegression"], "C": [0.1, 1]}'.
+	Classifier options and max_feats can be swept, but max_feats cannot be
+	combined with --max_feats or --min_score. The corpus is loaded and
+	featurized once, configurations are run in parallel with --jobs, and the
+	accuracy, training time and pickled model size of each is reported
+	instead of pickling a classifier.''')
+eval_group.add_argument('--sweep-format', default='table', choices=('table', 'json'),
+	help='output format for --sweep results, defaults to %(default)s')
 
 nltk_trainer.classification.args.add_maxent_args(parser)
 nltk_trainer.classification.args.add_decision_tree_args(parser)
@@ -135,6 +179,19 @@ nltk_trainer.classification.args.add_sklearn_args(parser)
 
 args = parser.parse_args()
 
+if args.stream and (args.cross_fold or (args.multi and args.binary) or
+		args.min_score or args.max_feats or args.cache_dir or args.jobs > 1):
+	raise ValueError('--stream does not work with --cross-fold, --multi --binary, --min_score, --max_feats, --cache-dir or --jobs')
+
+if args.sweep and (args.cross_fold or args.stream):
+	raise ValueError('--sweep does not work with --cross-fold or --stream')
+
+if args.sweep:
+	sweep_grid = sweep.load_grid(args.sweep)
+	# swept max_feats are the top ranked of every word, not of already filtered words
+	if 'max_feats' in sweep_grid and (args.max_feats or args.min_score):
+		raise ValueError('max_feats cannot be swept with --max_feats or --min_score')
+
 ###################
 ## corpus reader ##
 ###################
@@ -169,7 +226,7 @@ if args.trace:
 	print('loading %s' % args.corpus)
 
 categorized_corpus = load_corpus_reader(args.corpus, args.reader,
-	*reader_args, **reader_kwargs)
+	*reader_args, cache_dir=args.cache_dir, **reader_kwargs)
 
 if not hasattr(categorized_corpus, 'categories'):
 	raise ValueError('%s is does not have categories for classification')
@@ -199,97 +256,213 @@ if args.filter_stopwords == 'no':
 else:
 	stopset = set(stopwords.words(args.filter_stopwords))
 
-def norm_words(words):
-	if not args.no_lowercase:
-		words = (w.lower() for w in words)
-	
-	if not args.punctuation:
-		words = (w.strip(string.punctuation) for w in words)
-		words = (w for w in words if w)
+norm_words = WordNormalizer(lowercase=not args.no_lowercase,
+	punctuation=None if args.punctuation else string.punctuation,
+	stopwords=stopset, stemmer=PorterStemmer() if args.stem_words else None,
+	ngrams=args.ngrams)
+
+
+######################
+## featureset cache ##
+######################
+
+# with --sketch-size, words are scored while streaming the training instances
+# from the corpus, before any are interned, so only the best words get ids
+sketch_scoring = bool(args.sketch_size and (args.min_score or args.max_feats))
+
+# instances are cached by normalization options, and featuresets by feature
+# options too, so only the stages whose options changed are rerun
+instances_data = featuresets_data = None
+
+if args.cache_dir:
+	instances_path = cache.cache_key_path(args.cache_dir, 'instances',
+		cache.corpus_fingerprint(categorized_corpus), labels, args.instances,
+		args.fraction, args.multi, args.binary, args.train_prefix, args.test_prefix,
+		args.no_lowercase, args.punctuation, args.filter_stopwords, args.stem_words,
+		args.ngrams, args.hash_features, sketch_scoring and (args.score_fn,
+		args.min_score, args.max_feats, args.sketch_size))
+	featuresets_path = cache.cache_key_path(args.cache_dir, 'featuresets',
+		instances_path, args.value_type, args.score_fn, args.min_score,
+		args.max_feats, args.sketch_size)
+	featuresets_data = cache.load_cache(featuresets_path)
 	
-	if stopset:
-		words = (w for w in words if w.lower() not in stopset)
+	if featuresets_data is None:
+		instances_data = cache.load_cache(instances_path)
 	
-	if args.stem_words:
-		stemmer = PorterStemmer()
-		words = (stemmer.stem(w) for w in words)
+	if args.trace and featuresets_data is not None:
+		print('loading cached featuresets from %s' % featuresets_path)
+	elif args.trace and instances_data is not None:
+		print('loading cached instances from %s' % instances_path)
 
-	# in case we modified words in a generator, ensure it's a list so we can add together
-	if not isinstance(words, list):
-		words = list(words)
+#####################
+## text extraction ##
+#####################
+
+if args.hash_features:
+	hasher = FeatureHasher(args.hash_features)
 	
-	if args.ngrams:
-		return functools.reduce(operator.add, [words if n == 1 else list(ngrams(words, n)) for n in args.ngrams])
+	if args.trace:
+		print('hashing features into %d bits' % args.hash_features)
+
+def make_vocab(tokens=()):
+	if args.hash_features:
+		# the ids of hashed words are their hashes, so nothing is interned
+		return HashedVocabulary(hasher)
 	else:
-		return words
+		return Vocabulary(tokens)
+
+# instances are stored as arrays of integer ids for each unique word or ngram
+vocab = make_vocab()
+bestwords = None
+
+def split_list(lis, fraction):
+	'''split a list into 2 lists based on the fraction provided. Used to break the instances into 
+	   train and test sets'''
+	if fraction != 1.0:
+		l = len(lis)
+		cutoff = int(math.ceil(l * fraction))
+		return lis[0:cutoff], lis[cutoff:]
+	else:
+		return lis, []
 
+def split_instances(instances):
+	if sketch_scoring:
+		# the same split as when the instances were streamed for scoring
+		return (list(stream.split_stream(instances, args.fraction)),
+			list(stream.split_stream(instances, args.fraction, train=False)))
+	else:
+		return split_list(instances, args.fraction)
 
-#####################
-## text extraction ##
-#####################
-if args.multi and args.binary:
+def multi_instances(prefix):
+	if args.jobs > 1:
+		return corpus.parallel_multi_category_instances(categorized_corpus, prefix,
+			args.instances, jobs=args.jobs)
+	
 	label_instance_function = {
 		'sents': corpus.multi_category_sent_words,
 		'paras': corpus.multi_category_para_words,
 		'files': corpus.multi_category_file_words
 	}
 	
-	lif = label_instance_function[args.instances]
-	train_instances = lif(categorized_corpus, args.train_prefix)
-	test_instances = lif(categorized_corpus, args.test_prefix)
-
-	# if we need all the words by category for score_fn, use this method
-	def category_words():
-		'''
-		return an iteration of tuples of category and list of all words in instances of that category.
-		Used if we are scoring the words for correlation to categories for feature selection (i.e.,
-		score_fn and max_feats are set)
-		'''
-		cat_words = defaultdict([])
-		for (words, cats) in train_instances:
-			if isinstance(cats, collections.Iterable):
-				for cat in cats:
-					cat_words[cat].extend(words)
-			else:
-				cat_words[cats].extend(words)
-		return iteritems(cat_words)
-
+	return label_instance_function[args.instances](categorized_corpus, prefix)
+
+def label_instances():
+	'''
+	Yield label, words for each instance with normalized words, reading the
+	corpus one label at a time.
+	'''
+	if args.jobs > 1:
+		instances = corpus.parallel_category_instances(categorized_corpus,
+			labels, args.instances, norm_words, args.jobs)
+	else:
+		label_instance_function = {
+			'sents': corpus.category_sent_words,
+			'paras': corpus.category_para_words,
+			'files': corpus.category_file_words
+		}
+		
+		lif = label_instance_function[args.instances]
+		instances = ((label, norm_words(i)) for label in labels for i in lif(categorized_corpus, label))
+	
+	for label, words in instances:
+		if words:
+			yield label, words
+
+def stream_category_words():
+	'''
+	Yield category, words for each training instance, streamed from the
+	corpus for sketch scoring.
+	'''
+	if args.multi and args.binary:
+		for words, cats in multi_instances(args.train_prefix):
+			words = list(words)
+			
+			for cat in cats:
+				yield cat, words
+	else:
+		for label, instances in itertools.groupby(label_instances(), lambda li: li[0]):
+			instances = stream.split_stream(instances, args.fraction)
+			yield label, itertools.chain.from_iterable(words for label, words in instances)
+
+if args.stream or featuresets_data is not None:
+	# instances aren't needed when the featuresets are already extracted,
+	# or when they're streamed from the corpus while training
+	train_instances = test_instances = None
+elif instances_data is not None:
+	vocab = make_vocab(instances_data['tokens'])
+	train_instances = instances_data['train']
+	test_instances = instances_data['test']
 else:
-	def split_list(lis, fraction):
-		'''split a list into 2 lists based on the fraction provided. Used to break the instances into 
-		   train and test sets'''
-		if fraction != 1.0:
-			l = len(lis)
-			cutoff = int(math.ceil(l * fraction))
-			return lis[0:cutoff], lis[cutoff:]
+	if sketch_scoring:
+		if args.trace:
+			print('calculating word scores in sketches of %d words' % args.sketch_size)
+		
+		score_fn = getattr(BigramAssocMeasures, args.score_fn)
+		word_scores = scoring.sketch_word_scores(stream_category_words(), score_fn, args.sketch_size)
+		
+		if args.min_score:
+			word_scores = dict([(w, s) for (w, s) in iteritems(word_scores) if s >= args.min_score])
+		
+		if args.max_feats:
+			ws = scoring.top_word_scores(word_scores, args.max_feats)
 		else:
-			return lis, []
-
-	label_instance_function = {
-		'sents': corpus.category_sent_words,
-		'paras': corpus.category_para_words,
-		'files': corpus.category_file_words
-	}
-	
-	lif = label_instance_function[args.instances]
-	train_instances = {}
-	test_instances = {}
+			ws = iteritems(word_scores)
+		# only the best words are interned, and other words are left out of instances
+		sketch_words = [w for (w, s) in ws]
+		vocab = make_vocab(sketch_words)
+		wordset = set(sketch_words)
+		encode = lambda words: vocab.encode([w for w in words if w in wordset])
+		
+		if args.trace:
+			print('%d words meet min_score and/or max_feats' % len(wordset))
+	else:
+		encode = vocab.encode
 	
-	for label in labels:
-		instances = (norm_words(i) for i in lif(categorized_corpus, label))
-		instances = [i for i in instances if i]
-		train_instances[label], test_instances[label] = split_list(instances, args.fraction)
-		if args.trace > 1:
-			info = (label, len(train_instances[label]), len(test_instances[label]))
-			print('%s: %d training instances, %d testing instances' % info)
-	# if we need all the words by category for score_fn, use this method
-	def category_words():
-		'''
-		return an iteration of tuples of category and list of all words in instances of that category.
-		Used if we are scoring the words for correlation to categories for feature selection (i.e.,
-		score_fn and max_feats are set)
-		'''
-		return ((cat, (word for i in instance_list for word in i)) for cat, instance_list in iteritems(train_instances))					
+	if args.multi and args.binary:
+		train_instances = [(encode(words), cats) for words, cats in multi_instances(args.train_prefix)]
+		test_instances = [(encode(words), cats) for words, cats in multi_instances(args.test_prefix)]
+	else:
+		train_instances = {}
+		test_instances = {}
+		encoded = ((label, encode(words)) for label, words in label_instances())
+		
+		for label, instances in itertools.groupby(encoded, lambda li: li[0]):
+			instances = [ids for label, ids in instances]
+			train_instances[label], test_instances[label] = split_instances(instances)
+		
+		for label in labels:
+			train_instances.setdefault(label, [])
+			test_instances.setdefault(label, [])
+			
+			if args.trace > 1:
+				info = (label, len(train_instances[label]), len(test_instances[label]))
+				print('%s: %d training instances, %d testing instances' % info)
+
+if args.trace > 1 and args.stem_words and args.jobs == 1:
+	print('stem cache %s' % norm_words.stem_cache.stats())
+
+if args.cache_dir and featuresets_data is None and instances_data is None:
+	tokens = None if args.hash_features else vocab.tokens
+	cache.dump_cache({'tokens': tokens, 'train': train_instances,
+		'test': test_instances}, instances_path)
+
+# if we need all the words by category for score_fn, use this method
+def category_words():
+	'''
+	return an iteration of tuples of category and list of all word id arrays in instances of that category.
+	Used if we are scoring the words for correlation to categories for feature selection (i.e.,
+	score_fn and max_feats are set)
+	'''
+	if args.multi and args.binary:
+		cat_ids = collections.defaultdict(list)
+		
+		for (ids, cats) in train_instances:
+			for cat in cats:
+				cat_ids[cat].append(ids)
+		
+		return iteritems(cat_ids)
+	else:
+		return iteritems(train_instances)
 
 ##################
 ## word scoring ##
@@ -297,19 +470,35 @@ else:
 
 score_fn = getattr(BigramAssocMeasures, args.score_fn)
 
-if args.min_score or args.max_feats:
+if args.stream:
+	# streamed instances are featurized from normalized words, without a vocabulary
+	if args.trace:
+		print('using %s feature extraction on streamed instances' %
+			('bag of words' if args.value_type == 'bool' else 'word counts'))
+	
+	if args.hash_features and args.value_type == 'bool':
+		featx = lambda words: hashed_bag_of_words(norm_words(words), hasher)
+	elif args.hash_features:
+		featx = lambda words: hashed_word_counts(norm_words(words), hasher)
+	elif args.value_type == 'bool':
+		featx = lambda words: bag_of_words(norm_words(words))
+	else:
+		featx = lambda words: word_counts(norm_words(words))
+elif featuresets_data is not None:
+	featx = None
+elif (args.min_score or args.max_feats) and not sketch_scoring:
 	if args.trace:
 		print('calculating word scores')
 	
-	# flatten the list of instances to a single iteration of all the words 
-	cat_words = category_words()
-	ws = scoring.sorted_word_scores(scoring.sum_category_word_scores(cat_words, score_fn))
+	word_scores = scoring.sum_category_id_scores(category_words(), score_fn, len(vocab))
 	
 	if args.min_score:
-		ws = [(w, s) for (w, s) in ws if s >= args.min_score]
+		word_scores = dict([(w, s) for (w, s) in iteritems(word_scores) if s >= args.min_score])
 	
 	if args.max_feats:
-		ws = ws[:args.max_feats]
+		ws = scoring.top_word_scores(word_scores, args.max_feats)
+	else:
+		ws = iteritems(word_scores)
 	
 	bestwords = set([w for (w, s) in ws])
 	
@@ -317,12 +506,12 @@ if args.min_score or args.max_feats:
 		if args.trace:
 			print('using bag of words from known set feature extraction')
 		
-		featx = lambda words: bag_of_words_in_set(words, bestwords)
+		featx = lambda ids: bag_of_ids_in_set(ids, bestwords, vocab)
 	else:
 		if args.trace:
 			print('using word counts from known set feature extraction')
 		
-		featx = lambda words: word_counts_in_set(words, bestwords)
+		featx = lambda ids: id_counts_in_set(ids, bestwords, vocab)
 	
 	if args.trace:
 		print('%d words meet min_score and/or max_feats' % len(bestwords))
@@ -330,12 +519,12 @@ elif args.value_type == 'bool':
 	if args.trace:
 		print('using bag of words feature extraction')
 	
-	featx = bag_of_words
+	featx = lambda ids: bag_of_ids(ids, vocab)
 else:
 	if args.trace:
 		print('using word counts feature extraction')
 	
-	featx = word_counts
+	featx = lambda ids: id_counts(ids, vocab)
 
 		
 #########################
@@ -344,42 +533,142 @@ else:
 def extract_features(label_instances, featx):
 	if isinstance(label_instances, dict):
 		# for not (args.multi and args.binary)
-        # e.g., li = { 'spam': [ ['hello','world',...], ... ], 'ham': [ ['lorem','ipsum'...], ... ] }
+        # e.g., li = { 'spam': [ array('I', [0, 1, ...]), ... ], 'ham': [ array('I', [2, 3, ...]), ... ] }
 		feats = []
 		for label, instances in iteritems(label_instances):
 			feats.extend([(featx(i), label) for i in instances])
 	else:
 		# for arg.multi and args.binary
-		# e.g., li = [ (['hello','world',...],label1), (['lorem','ipsum'],label2) ]
+		# e.g., li = [ (array('I', [0, 1, ...]), labels1), (array('I', [2, 3, ...]), labels2) ]
 		feats = [(featx(i), label) for i, label in label_instances ]
 	return feats
 
 	
-train_feats = extract_features(train_instances, featx)
-test_feats = extract_features(test_instances, featx)
+def stream_feats(train=True):
+	'''
+	Yield labeled training or testing featuresets for --stream, reading the
+	corpus one instance at a time and mixing every label.
+	'''
+	lif = {
+		'sents': corpus.category_sent_words,
+		'paras': corpus.category_para_words,
+		'files': corpus.category_file_words
+	}[args.instances]
+	
+	def label_feats(label):
+		feats = (featx(i) for i in lif(categorized_corpus, label))
+		feats = (feat for feat in feats if feat)
+		
+		if args.fraction != 1.0:
+			feats = stream.split_stream(feats, args.fraction, train)
+		
+		for feat in feats:
+			yield feat, label
+	
+	return stream.interleave([label_feats(label) for label in labels])
+
+# a single sklearn classifier is trained straight from the id arrays, so
+# training featuresets are never extracted
+train_on_ids = (train_instances is not None and not args.sweep and not args.cross_fold
+	and not (args.multi and args.binary) and len(args.classifier) == 1
+	and args.classifier[0].startswith('sklearn.'))
+
+if args.stream:
+	# featuresets are extracted a batch at a time while training and testing
+	train_feats = test_feats = None
+elif featuresets_data is not None:
+	train_feats = cache.decode_featuresets(featuresets_data['train'])
+	test_feats = cache.decode_featuresets(featuresets_data['test'])
+elif train_on_ids:
+	# train_feats are (id array, label) pairs, in the same order as featuresets
+	train_feats = extract_features(train_instances, lambda ids: ids)
+	test_feats = extract_features(test_instances, featx)
+	
+	if not test_feats:
+		test_feats = extract_features(train_instances, featx)
+else:
+	train_feats = extract_features(train_instances, featx)
+	test_feats = extract_features(test_instances, featx)
+	
+	if args.cache_dir:
+		cache.dump_cache({'train': cache.encode_featuresets(train_feats),
+			'test': cache.encode_featuresets(test_feats)}, featuresets_path)
+
 # if there were no instances reserved for testing, test over the whole training set
 if not test_feats:
 	test_feats = train_feats
 
-if args.trace:
+if args.trace and not args.stream:
        print('%d training feats, %d testing feats' % (len(train_feats), len(test_feats)))
 
+###########
+## sweep ##
+###########
+if args.sweep:
+	grid = sweep_grid
+	configs = sweep.expand_grid(grid)
+	ranked_feats = None
+	
+	if 'max_feats' in grid:
+		if train_instances is None:
+			raise ValueError('max_feats cannot be swept when featuresets are loaded from the cache')
+		# rank every word once, so each max_feats only has to filter the featuresets
+		word_scores = scoring.sum_category_id_scores(category_words(), score_fn, len(vocab))
+		ranked_feats = [vocab.tokens[w] for (w, s) in scoring.sorted_word_scores(word_scores)]
+	
+	if args.trace:
+		print('sweeping %d configurations' % len(configs))
+	
+	multi_labels = labels if args.multi and args.binary else None
+	rows = []
+	
+	for row in sweep.sweep(args, configs, train_feats, test_feats, ranked_feats,
+			multi_labels, jobs=args.jobs):
+		if args.trace > 1:
+			print('accuracy %f for %s' % (row['accuracy'], dict([(k, row[k]) for k in sorted(grid)])))
+		
+		rows.append(row)
+	
+	if args.sweep_format == 'json':
+		print(json.dumps(rows, indent=2))
+	else:
+		print(sweep.format_table(rows))
+	
+	sys.exit(0)
+
 ##############
 ## training ##
 ##############
-trainf = nltk_trainer.classification.args.make_classifier_builder(args)
+if args.stream:
+	trainer = nltk_trainer.classification.args.make_incremental_trainer(args, labels)
+elif train_on_ids:
+	trainf = nltk_trainer.classification.args.make_id_trainer(args, vocab, bestwords)
+else:
+	trainf = nltk_trainer.classification.args.make_classifier_builder(args)
 
 if args.cross_fold:
 	if args.multi and args.binary:
 		raise NotImplementedError ("cross-fold is not supported for multi-binary classifiers")
-	scoring.cross_fold(train_feats, trainf, accuracy, folds=args.cross_fold,
-		trace=args.trace, metrics=not args.no_eval, informative=args.show_most_informative)
+	scoring.cross_fold(train_feats, trainf, folds=args.cross_fold,
+		trace=args.trace, metrics=not args.no_eval, informative=args.show_most_informative,
+		jobs=args.jobs)
 	sys.exit(0)
 
-if args.multi and args.binary:
+if args.stream:
+	if args.trace:
+		print('training %s classifier in batches of %d' % (args.classifier[0], args.batch_size))
+	
+	for n, batch in enumerate(stream.batches(stream_feats(), args.batch_size)):
+		trainer.update(batch)
+		
+		if args.trace > 1:
+			print('trained on batch %d of %d featuresets' % (n + 1, len(batch)))
+	
+	classifier = trainer.classifier()
+elif args.multi and args.binary:
 	if args.trace:
 		print('training multi-binary %s classifier' % args.classifier)
-	classifier = MultiBinaryClassifier.train(labels, train_feats, trainf)
+	classifier = MultiBinaryClassifier.train(labels, train_feats, trainf, jobs=args.jobs)
 else:
 	classifier = trainf(train_feats)
 
@@ -387,33 +676,34 @@ else:
 ## evaluation ##
 ################
 if not args.no_eval:
+	# the test featuresets are classified once, and every metric comes from the results
+	if args.stream:
+		# testing featuresets are read again in batches, and if there were no
+		# instances reserved for testing, the training instances are used
+		evaluation = scoring.Evaluation(labels)
+		
+		for batch in stream.batches(stream_feats(train=args.fraction == 1.0), args.batch_size):
+			evaluation.update(classifier, batch)
+	elif args.multi and args.binary:
+		evaluation = scoring.evaluate_multi(classifier, test_feats, labels)
+	else:
+		evaluation = scoring.evaluate(classifier, test_feats, labels)
+	
 	if not args.no_accuracy:
-		try:
-			print('accuracy: %f' % accuracy(classifier, test_feats))
-		except ZeroDivisionError:
-			print('accuracy: 0')
-
+		print('accuracy: %f' % evaluation.accuracy())
+	
 	if args.multi and args.binary and not args.no_masi_distance:
-		print('average masi distance: %f' % (scoring.avg_masi_distance(classifier, test_feats)))
+		print('average masi distance: %f' % evaluation.avg_masi_distance())
 	
-	if not args.no_precision or not args.no_recall or not args.no_fmeasure:
-		if args.multi and args.binary:
-			refsets, testsets = scoring.multi_ref_test_sets(classifier, test_feats)
-		else:
-			refsets, testsets = scoring.ref_test_sets(classifier, test_feats)
+	for label in labels:
+		if not args.no_precision:
+			print('%s precision: %f' % (label, evaluation.precision(label)))
 		
-		for label in labels:
-			ref = refsets[label]
-			test = testsets[label]
-			
-			if not args.no_precision:
-				print('%s precision: %f' % (label, precision(ref, test) or 0))
-			
-			if not args.no_recall:
-				print('%s recall: %f' % (label, recall(ref, test) or 0))
-			
-			if not args.no_fmeasure:
-				print('%s f-measure: %f' % (label, f_measure(ref, test) or 0))
+		if not args.no_recall:
+			print('%s recall: %f' % (label, evaluation.recall(label)))
+		
+		if not args.no_fmeasure:
+			print('%s f-measure: %f' % (label, evaluation.f_measure(label)))
 
 if args.show_most_informative and hasattr(classifier, 'show_most_informative_features') and not (args.multi and args.binary) and not args.cross_fold:
 	print('%d most informative features' % args.show_most_informative)
@@ -430,4 +720,13 @@ if not args.no_pickle:
 		name = '%s_%s.pickle' % (corpus_clean, '_'.join(args.classifier))
 		fname = os.path.join(os.path.expanduser('~/nltk_data/classifiers'), name)
 	
+	if args.compile:
+		if args.trace:
+			print('compiling classifier')
+		
+		classifier = compile_classifier(classifier)
+	
 	dump_object(classifier, fname, trace=args.trace)
+	
+	if args.hash_features:
+		dump_hash_config(hasher, fname, trace=args.trace)
@@ -8,7 +8,10 @@ from nltk.corpus.reader import SwitchboardCorpusReader, NPSChatCorpusReader, Ind
 from nltk.corpus.util import LazyCorpusLoader
 from nltk.tag import ClassifierBasedPOSTagger
 from nltk_trainer import dump_object, load_corpus_reader, simplify_wsj_tag
+from nltk_trainer.cache import unwrap_reader
 from nltk_trainer.tagging import readers
+from nltk_trainer.tagging.compact import compact_backoff_tagger
+from nltk_trainer.tagging.compiled import compile_backoff_tagger
 from nltk_trainer.tagging.training import train_brill_tagger
 from nltk_trainer.tagging.taggers import PhoneticClassifierBasedPOSTagger
 
@@ -39,6 +42,9 @@ corpus_group.add_argument('--fileids', default=None,
 	help='Specify fileids to load from corpus')
 corpus_group.add_argument('--fraction', default=1.0, type=float,
 	help='Fraction of corpus to use for training, defaults to %(default)f')
+corpus_group.add_argument('--cache-dir', default=None,
+	help='''Directory for caching the tokenized corpus, so later runs with the
+same corpus can skip tokenization''')
 
 tagger_group = parser.add_argument_group('Tagger Choices')
 tagger_group.add_argument('--default', default='-None-',
@@ -68,6 +74,13 @@ sequential_group.add_argument('-a', '--affix', action='append', type=int,
 Negative numbers are suffixes, positive numbers are prefixes.
 You can use this option multiple times to create multiple AffixTaggers with different affixes.
 The affixes will be used in the order given.''')
+sequential_group.add_argument('--compile', action='store_true', default=False,
+	help='''Compile the sequential backoff taggers into a single tagger with one
+lookup table, which gives the same tags as the backoff taggers, but faster.''')
+sequential_group.add_argument('--compact', action='store_true', default=False,
+	help='''Store the context tables of the sequential backoff taggers in compact
+arrays of packed word and tag ids, which use much less memory than dicts,
+but make tagging slower.''')
 
 brill_group = parser.add_argument_group('Brill Tagger Options')
 brill_group.add_argument('--brill', action='store_true', default=False,
@@ -109,6 +122,9 @@ eval_group.add_argument('--no-eval', action='store_true', default=False,
 
 args = parser.parse_args()
 
+if args.compact and args.compile:
+	raise ValueError('--compact does not work with --compile')
+
 ###################
 ## corpus reader ##
 ###################
@@ -116,7 +132,8 @@ args = parser.parse_args()
 if args.trace:
 	print('loading %s' % args.corpus)
 
-tagged_corpus = load_corpus_reader(args.corpus, reader=args.reader, fileids=args.fileids)
+tagged_corpus = load_corpus_reader(args.corpus, reader=args.reader, fileids=args.fileids,
+	cache_dir=args.cache_dir)
 fileids = args.fileids
 kwargs = {}
 
@@ -132,15 +149,15 @@ elif not simplify_wsj_tag and args.tagset:
 	if args.trace:
 		print('using %s tagset' % args.tagset)
 
-if isinstance(tagged_corpus, SwitchboardCorpusReader):
+if isinstance(unwrap_reader(tagged_corpus), SwitchboardCorpusReader):
 	if fileids:
 		raise ValueError('fileids cannot be used with switchboard')
 	
 	tagged_sents = list(itertools.chain(*[[list(s) for s in d if s] for d in tagged_corpus.tagged_discourses(**kwargs)]))
-elif isinstance(tagged_corpus, NPSChatCorpusReader):
+elif isinstance(unwrap_reader(tagged_corpus), NPSChatCorpusReader):
 	tagged_sents = tagged_corpus.tagged_posts(**kwargs)
 else:
-	if isinstance(tagged_corpus, IndianCorpusReader) and not fileids:
+	if isinstance(unwrap_reader(tagged_corpus), IndianCorpusReader) and not fileids:
 		fileids = 'hindi.pos'
 	
 	if fileids and fileids in tagged_corpus.fileids():
@@ -227,6 +244,18 @@ if args.sequential:
 		constructor = sequential_constructors[c]
 		tagger = constructor(train_sents, backoff=tagger)
 
+if args.compile:
+	if args.trace:
+		print('compiling backoff taggers from %s' % tagger)
+	
+	tagger = compile_backoff_tagger(tagger)
+
+if args.compact:
+	if args.trace:
+		print('compacting context tables of %s' % tagger)
+	
+	tagger = compact_backoff_tagger(tagger)
+
 #######################
 ## classifier tagger ##
 #######################
@@ -270,6 +299,10 @@ if args.brill:
 if not args.no_eval:
 	print('evaluating %s' % tagger.__class__.__name__)
 	print('accuracy: %f' % tagger.evaluate(test_sents))
+	
+	if args.trace and isinstance(tagger, PhoneticClassifierBasedPOSTagger):
+		for key, cache in sorted(tagger.phonetic_caches.items()):
+			print('%s cache %s' % (key, cache.stats()))
 
 ##############
 ## pickling ##